@@ -0,0 +1,136 @@
+"""Asyncio variant of the MQTT -> MongoDB subscriber.
+
+The threaded subscriber hides Mongo latency behind a worker thread and a
+queue, paying two context switches per message. Here aiomqtt reception
+and motor inserts share one event loop: messages accumulate while an
+insert_many is awaiting the server, so MQTT RX and Mongo I/O overlap
+without threads.
+
+Requires aiomqtt and motor:
+    pip install aiomqtt motor
+"""
+
+import asyncio
+import argparse
+import struct
+from datetime import datetime
+
+import aiomqtt
+from motor.motor_asyncio import AsyncIOMotorClient
+
+HEADER_MAGIC = b'\x55\x55\x55\x55'
+HEADER_LENGTH = 8   # 4 (magic) + 1 (sequence) + 2 (n_adv_raw) + 1 (n_mac)
+DEVICE_LENGTH = 42  # 6 + 1 + 1 + 1 + 1 + 31 + 1
+MAX_INSERT_BATCH = 500
+FLUSH_INTERVAL = 1.0  # seconds a document may wait before being flushed
+
+_HEADER_STRUCT = struct.Struct('<4sBHB')
+_DEVICE_STRUCT = struct.Struct('<6sBBbB31sB')
+
+
+def parse_buffer(raw_data):
+    """Decode one raw UART frame into a Mongo document (None if invalid)"""
+    mv = memoryview(raw_data)
+    if len(mv) < HEADER_LENGTH or bytes(mv[:4]) != HEADER_MAGIC:
+        return None
+
+    _, sequence, n_adv_raw, n_mac = _HEADER_STRUCT.unpack_from(mv, 0)
+    if len(mv) < HEADER_LENGTH + n_mac * DEVICE_LENGTH:
+        return None
+
+    devices = [
+        {
+            'mac': mac.hex(':').upper(),
+            'addr_type': addr_type,
+            'adv_type': adv_type,
+            'rssi': rssi,
+            'data_len': data_len,
+            'data': adv_data[:data_len].hex(),
+            'n_adv': n_adv,
+        }
+        for mac, addr_type, adv_type, rssi, data_len, adv_data, n_adv
+        in _DEVICE_STRUCT.iter_unpack(
+            mv[HEADER_LENGTH:HEADER_LENGTH + n_mac * DEVICE_LENGTH])
+    ]
+
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'sequence': sequence,
+        'n_adv_raw': n_adv_raw,
+        'n_mac': n_mac,
+        'devices': devices,
+    }
+
+
+async def mongo_writer(queue, collection):
+    """Drain parsed documents and insert them in batches"""
+    inserted = 0
+    while True:
+        batch = [await queue.get()]
+        # Collect whatever arrives within the flush window, up to the
+        # batch cap, so bursts become one insert_many round-trip
+        deadline = asyncio.get_running_loop().time() + FLUSH_INTERVAL
+        while len(batch) < MAX_INSERT_BATCH:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        try:
+            await collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            print(f"Inserted {len(batch)} messages ({inserted} total)")
+        except Exception as e:
+            print(f"Error inserting batch: {e}")
+
+
+async def mqtt_receiver(queue, broker, port, topic):
+    """Subscribe and enqueue parsed messages, reconnecting on broker loss"""
+    while True:
+        try:
+            async with aiomqtt.Client(broker, port) as client:
+                print(f"Connected to MQTT broker at {broker}:{port}")
+                await client.subscribe(topic, qos=1)
+                async for msg in client.messages:
+                    payload = parse_buffer(msg.payload)
+                    if payload is None:
+                        print(f"Discarded invalid buffer of {len(msg.payload)} bytes")
+                        continue
+                    await queue.put(payload)
+        except aiomqtt.MqttError as e:
+            print(f"MQTT error: {e}, reconnecting in 5s")
+            await asyncio.sleep(5)
+
+
+async def main(args):
+    mongo_client = AsyncIOMotorClient(args.mongo_uri)
+    collection = mongo_client.ble_scanner.session3
+
+    # Bounded queue: if Mongo falls behind, backpressure reception
+    # instead of growing memory without limit
+    queue = asyncio.Queue(maxsize=1000)
+    await asyncio.gather(
+        mqtt_receiver(queue, args.mqtt_broker, args.mqtt_port, args.mqtt_topic),
+        mongo_writer(queue, collection),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Async MQTT Subscriber to MongoDB')
+    parser.add_argument('--mqtt-broker', type=str, default="localhost",
+                        help='MQTT broker address (default: localhost)')
+    parser.add_argument('--mqtt-port', type=int, default=1883,
+                        help='MQTT broker port (default: 1883)')
+    parser.add_argument('--mqtt-topic', type=str, default="admin/reader",
+                        help='MQTT topic to subscribe to (default: admin/reader)')
+    parser.add_argument('--mongo-uri', type=str,
+                        default="mongodb://localhost:27017/",
+                        help='MongoDB URI (default: mongodb://localhost:27017/)')
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        print("\nStopped by user")
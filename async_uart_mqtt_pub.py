@@ -0,0 +1,96 @@
+"""Asyncio variant of the UART -> MQTT publisher.
+
+The synchronous publisher blocks on serial.read and then on the publish
+before the next read, so a slow broker stalls capture. Here the UART
+reader and the MQTT publisher run as separate tasks joined by an
+asyncio.Queue: the next buffer is read while the previous one is still
+in flight to the broker.
+
+Requires pyserial-asyncio and aiomqtt:
+    pip install pyserial-asyncio aiomqtt
+"""
+
+import asyncio
+import argparse
+import struct
+
+import serial_asyncio
+import aiomqtt
+
+HEADER_MAGIC = b'\x55\x55\x55\x55'
+HEADER_LENGTH = 8   # 4 (magic) + 1 (sequence) + 2 (n_adv_raw) + 1 (n_mac)
+DEVICE_LENGTH = 42  # 6 + 1 + 1 + 1 + 1 + 31 + 1
+MAX_DEVICES = 64
+
+_HEADER_TAIL_STRUCT = struct.Struct('<BHB')  # sequence, n_adv_raw, n_mac
+
+
+async def uart_reader(reader, queue):
+    """Read complete UART frames and hand them to the publish queue"""
+    while True:
+        # readuntil consumes garbage up to and including the magic
+        await reader.readuntil(HEADER_MAGIC)
+        header_tail = await reader.readexactly(HEADER_LENGTH - len(HEADER_MAGIC))
+        _, _, n_mac = _HEADER_TAIL_STRUCT.unpack(header_tail)
+
+        if n_mac > MAX_DEVICES:
+            print(f"Invalid device count in header: {n_mac}, resyncing")
+            continue
+
+        device_data = await reader.readexactly(n_mac * DEVICE_LENGTH)
+        await queue.put(HEADER_MAGIC + header_tail + device_data)
+
+
+async def mqtt_publisher(queue, broker, port, topic, qos):
+    """Drain the queue and publish each frame, reconnecting on broker loss"""
+    published = 0
+    while True:
+        try:
+            async with aiomqtt.Client(broker, port) as client:
+                print(f"Connected to MQTT broker at {broker}:{port}")
+                while True:
+                    frame = await queue.get()
+                    await client.publish(topic, frame, qos=qos)
+                    published += 1
+                    print(f"Published buffer #{published} ({len(frame)} bytes)")
+        except aiomqtt.MqttError as e:
+            print(f"MQTT error: {e}, reconnecting in 5s")
+            await asyncio.sleep(5)
+
+
+async def main(args):
+    reader, _ = await serial_asyncio.open_serial_connection(
+        url=args.port, baudrate=args.baudrate
+    )
+    print(f"Opened serial port {args.port} at {args.baudrate} baud")
+
+    # Bounded queue: if the broker falls behind, backpressure the reader
+    # instead of growing memory without limit
+    queue = asyncio.Queue(maxsize=100)
+    await asyncio.gather(
+        uart_reader(reader, queue),
+        mqtt_publisher(queue, args.mqtt_broker, args.mqtt_port,
+                       args.mqtt_topic, args.mqtt_qos),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Async BLE Scanner UART MQTT Publisher')
+    parser.add_argument('--port', type=str, default='/dev/ttyUSB0',
+                        help='Serial port (default: /dev/ttyUSB0)')
+    parser.add_argument('--baudrate', type=int, default=115200,
+                        help='Serial baudrate (default: 115200)')
+    parser.add_argument('--mqtt-broker', type=str, default="localhost",
+                        help='MQTT broker address (default: localhost)')
+    parser.add_argument('--mqtt-port', type=int, default=1883,
+                        help='MQTT broker port (default: 1883)')
+    parser.add_argument('--mqtt-topic', type=str, default="admin/reader",
+                        help='MQTT topic (default: admin/reader)')
+    parser.add_argument('--mqtt-qos', type=int, choices=[0, 1], default=0,
+                        help='MQTT QoS for raw buffers (default: 0)')
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args))
+    except KeyboardInterrupt:
+        print("\nStopped by user")
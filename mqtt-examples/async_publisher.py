@@ -0,0 +1,53 @@
+"""Publicador asíncrono de ejemplo basado en aiomqtt.
+
+A diferencia de publisher.py (paho + loop_start), aquí no hay un hilo de red
+dedicado: todas las publicaciones de un ciclo se encolan en el mismo tick del
+event loop y salen juntas por el socket, sin un cambio de contexto por mensaje.
+
+Requiere: pip install aiomqtt
+"""
+
+import asyncio
+import time
+
+try:
+    import orjson
+except ImportError:
+    import json as orjson
+
+import aiomqtt
+
+BROKER = "localhost"
+PORT = 1883
+
+
+async def main():
+    sequence = 0
+
+    async with aiomqtt.Client(BROKER, port=PORT) as client:
+        print("Conectado al broker, publicando...")
+        while True:
+            ts = int(time.time())
+            temp_data = {"value": 25.50, "unit": "C",
+                         "timestamp": ts, "sequence": sequence}
+            humid_data = {"value": 45.00, "unit": "%",
+                          "timestamp": ts, "sequence": sequence}
+
+            # Ambas publicaciones se lanzan en el mismo tick del event loop
+            await asyncio.gather(
+                client.publish("test/temperature", orjson.dumps(temp_data), retain=True),
+                client.publish("test/humidity", orjson.dumps(humid_data), retain=True),
+            )
+
+            print(f"[Seq:{sequence}] Publicado: Temp={temp_data['value']}°C, "
+                  f"Humedad={humid_data['value']}%")
+            sequence = (sequence + 1) % 256
+
+            await asyncio.sleep(2)
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print("\nDeteniendo el publicador...")
@@ -1,8 +1,15 @@
 from collections.abc import KeysView
 import paho.mqtt.client as mqtt
+import socket
 import time
 import random
-import json
+
+# orjson serializa directamente a bytes (mucho más rápido que json);
+# si no está instalado se usa el json estándar como fallback
+try:
+    import orjson
+except ImportError:
+    import json as orjson
 
 # Callback que se ejecuta cuando el cliente se conecta al broker
 def on_connect(client, userdata, flags, rc, properties):
@@ -10,6 +17,14 @@ def on_connect(client, userdata, flags, rc, properties):
     # rc = 0: Conexión exitosa
     # rc > 0: Varios tipos de error en la conexión
 
+    # Desactivar el algoritmo de Nagle para no retrasar los PUBLISH pequeños
+    try:
+        sock = client.socket()
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    except OSError as e:
+        print(f"No se pudo activar TCP_NODELAY: {e}")
+
 # Crear instancia del cliente MQTT
 client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
 
@@ -24,33 +39,42 @@ client.connect("localhost", 1883, 60)
 # Iniciar el loop de eventos en segundo plano
 client.loop_start()
 
-def get_test_data():
-    """Genera datos de prueba fijos para testing"""
-    temp_data = {
-        "value": 25.50,    # Temperatura fija para testing
-        "unit": "C",
-        "timestamp": int(time.time())
-    }
-    
-    humid_data = {
-        "value": 45.00,    # Humedad fija para testing
-        "unit": "%",
-        "timestamp": int(time.time())
-    }
-    
-    return temp_data, humid_data
+# Plantillas de payload persistentes: se construyen una sola vez y en cada
+# ciclo solo se mutan los campos variables (timestamp y sequence), evitando
+# reconstruir los diccionarios en cada publicación
+temp_data = {
+    "value": 25.50,    # Temperatura fija para testing
+    "unit": "C",
+    "timestamp": 0,
+    "sequence": 0
+}
+
+humid_data = {
+    "value": 45.00,    # Humedad fija para testing
+    "unit": "%",
+    "timestamp": 0,
+    "sequence": 0
+}
+
+def update_test_data():
+    """Actualiza las plantillas de datos de prueba para el ciclo actual"""
+    # Una sola llamada a time.time() por ciclo: ambas muestras llevan
+    # el mismo timestamp (y se evita una syscall extra)
+    ts = int(time.time())
+    temp_data["timestamp"] = ts
+    humid_data["timestamp"] = ts
 
 try:
     sequence = 0  # Contador de secuencia para testing
     while True:
-        temp_data, humid_data = get_test_data()
-        
+        update_test_data()
+
         # Agregar número de secuencia para tracking
         temp_data["sequence"] = sequence
         humid_data["sequence"] = sequence
-        
-        client.publish("test/temperature", json.dumps(temp_data), retain=True)
-        client.publish("test/humidity", json.dumps(humid_data), retain=True)
+
+        client.publish("test/temperature", orjson.dumps(temp_data), retain=True)
+        client.publish("test/humidity", orjson.dumps(humid_data), retain=True)
         
         print(f"[Seq:{sequence}] Publicado: Temp={temp_data['value']}°C, Humedad={humid_data['value']}%")
         sequence = (sequence + 1) % 256  # Simular byte de secuencia
@@ -0,0 +1,89 @@
+"""Publicador MQTT "raw" de ejemplo: frames PUBLISH preformados sobre un socket.
+
+Para streams QoS 0 de topic fijo, la librería paho añade una cola, un hilo de
+red y trabajo por mensaje que no hace falta: el frame PUBLISH se puede
+construir una sola vez (cabecera fija + topic) y en cada publicación solo
+varían la longitud y el payload — un único sendall() por mensaje.
+
+Solo apto para telemetría best-effort (QoS 0, sin reconexión automática).
+"""
+
+import json
+import socket
+import struct
+import time
+
+# orjson serializa directo a bytes; el fallback stdlib devuelve str y
+# hay que codificarlo para poder concatenarlo al frame PUBLISH
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+except ImportError:
+    def _json_dumps(document):
+        return json.dumps(document).encode('utf-8')
+
+BROKER = "localhost"
+PORT = 1883
+TOPIC = b"test/temperature"
+CLIENT_ID = b"raw-publisher"
+
+
+def encode_remaining_length(n):
+    """Codifica la longitud restante MQTT como varint (1-4 bytes)"""
+    out = bytearray()
+    while True:
+        byte = n % 128
+        n //= 128
+        if n:
+            byte |= 0x80
+        out.append(byte)
+        if not n:
+            return bytes(out)
+
+
+def connect(sock):
+    """Envía un CONNECT MQTT 3.1.1 mínimo y valida el CONNACK"""
+    variable_header = b"\x00\x04MQTT\x04\x02\x00\x3c"  # clean session, keepalive 60s
+    payload = struct.pack(">H", len(CLIENT_ID)) + CLIENT_ID
+    remaining = variable_header + payload
+    sock.sendall(b"\x10" + encode_remaining_length(len(remaining)) + remaining)
+
+    connack = sock.recv(4)
+    if len(connack) < 4 or connack[3] != 0:
+        raise ConnectionError(f"CONNACK inválido: {connack.hex()}")
+
+
+if __name__ == "__main__":
+    sock = socket.create_connection((BROKER, PORT))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    connect(sock)
+    print("Conectado al broker (socket raw)")
+
+    # Bloque de topic precalculado: en el bucle solo varían la longitud
+    # restante y el payload
+    topic_block = struct.pack(">H", len(TOPIC)) + TOPIC
+
+    try:
+        sequence = 0
+        while True:
+            payload = _json_dumps({
+                "value": 25.50,
+                "unit": "C",
+                "timestamp": int(time.time()),
+                "sequence": sequence,
+            })
+            remaining = len(topic_block) + len(payload)
+            # PUBLISH QoS 0 (0x30): un único sendall por mensaje
+            sock.sendall(b"\x30" + encode_remaining_length(remaining)
+                         + topic_block + payload)
+
+            print(f"[Seq:{sequence}] Publicado en {TOPIC.decode()}")
+            sequence = (sequence + 1) % 256
+            time.sleep(2)
+
+    except KeyboardInterrupt:
+        print("\nDeteniendo el publicador...")
+    finally:
+        # DISCONNECT y cierre ordenado
+        sock.sendall(b"\xe0\x00")
+        sock.close()
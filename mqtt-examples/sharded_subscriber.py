@@ -0,0 +1,71 @@
+"""Suscriptor fragmentado (sharded) de ejemplo.
+
+Cuando un único proceso suscriptor se convierte en el cuello de botella
+(el parseo de JSON en on_message es CPU puro y compite por el GIL), se
+pueden lanzar N procesos y repartir los topics entre ellos: cada worker
+solo parsea su fragmento, escalando el consumo de forma lineal con los
+núcleos disponibles.
+
+Uso: python sharded_subscriber.py [num_workers]
+"""
+
+import sys
+import time
+import multiprocessing
+
+import paho.mqtt.client as mqtt
+
+try:
+    import orjson
+except ImportError:
+    import json as orjson
+
+BROKER = "localhost"
+PORT = 1883
+
+# Topics a repartir entre los workers
+TOPICS = ["test/temperature", "test/humidity"]
+
+
+def worker(worker_id, topics):
+    """Proceso suscriptor: atiende únicamente su fragmento de topics"""
+
+    def on_connect(client, userdata, flags, rc, properties):
+        print(f"[worker {worker_id}] Conectado, topics: {topics}")
+        for topic in topics:
+            client.subscribe(topic)
+
+    def on_message(client, userdata, msg):
+        try:
+            data = orjson.loads(msg.payload)
+            print(f"[worker {worker_id}] {msg.topic}: {data}")
+        except orjson.JSONDecodeError:
+            print(f"[worker {worker_id}] ⚠️ JSON inválido en {msg.topic}")
+
+    client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+    client.on_connect = on_connect
+    client.on_message = on_message
+    client.connect(BROKER, PORT, 60)
+    client.loop_forever()
+
+
+if __name__ == "__main__":
+    num_workers = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    num_workers = min(num_workers, len(TOPICS))
+
+    processes = []
+    for i in range(num_workers):
+        # Reparto round-robin: el worker i atiende los topics i, i+N, i+2N...
+        p = multiprocessing.Process(target=worker, args=(i, TOPICS[i::num_workers]))
+        p.start()
+        processes.append(p)
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        print("\nDeteniendo workers...")
+        for p in processes:
+            p.terminate()
+        for p in processes:
+            p.join()
@@ -1,7 +1,13 @@
 import paho.mqtt.client as mqtt
-import json
 import time
 
+# orjson parsea bytes directamente (sin .decode() previo);
+# fallback al json estándar si no está instalado
+try:
+    import orjson
+except ImportError:
+    import json as orjson
+
 # Callback que se ejecuta cuando el cliente se conecta exitosamente al broker
 def on_connect(client,userdata,flags,rc,properties):
     print("¡Conectado! Código de resultado: " +str(rc))
@@ -12,7 +18,7 @@ def on_connect(client,userdata,flags,rc,properties):
 # Callback que se ejecuta cuando se recibe un mensaje en algún topic suscrito
 def on_message(client, userdata, msg):
     try:
-        data = json.loads(msg.payload.decode())
+        data = orjson.loads(msg.payload)
         
         # Verificar secuencia
         if hasattr(on_message, 'last_sequence'):
@@ -30,7 +36,7 @@ def on_message(client, userdata, msg):
         print(f"Topic: {msg.topic}")
         print(f"Mensaje: {data}")
         
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         print(f"⚠️ Error: JSON inválido en {msg.topic}")
         print(f"Payload: {msg.payload}")
     except Exception as e:
@@ -1,20 +1,64 @@
 import serial
-from datetime import datetime
 import time
 import argparse
 import json
+import struct
+
+# orjson serializes straight to bytes ~5x faster than stdlib json; fall
+# back transparently when it is not installed
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+except ImportError:
+    def _json_dumps(document):
+        return json.dumps(document).encode('utf-8')
+
+# Optional binary codecs: ~30-50% smaller payloads than JSON for this
+# numeric/short-string telemetry, and faster to encode
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
 import paho.mqtt.client as mqtt
 from uart import UARTReceiver
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import os
+from pathlib import Path
+import queue
+import socket
 from enum import Enum
 import signal
 import sys
+import threading
 
 class LogLevel(str, Enum):
     INFO = "info"
     DEBUG = "debug"
 
+# Start/finish banner timestamp format; time.strftime avoids building a
+# datetime object for a one-line log message
+_TS_FMT = '%Y-%m-%d %H:%M:%S'
+
+# Precompiled header layout: magic (4) + sequence (1) + n_adv_raw (2) + n_mac (1).
+# A compiled Struct parses all fields in one C call instead of re-parsing the
+# format string and slicing per field on every buffer.
+_HEADER_STRUCT = struct.Struct('<4sBHB')
+
+# Device record layout as currently consumed (16 data bytes + n_adv, with the
+# remaining 15 bytes of the 42-byte record ignored); one compiled Struct
+# replaces seven per-field int.from_bytes calls and their slice allocations
+_DEVICE_STRUCT = struct.Struct('<6sBBbB16sB15x')
+
+# Length prefix framing for batched publishes: each buffer inside a batch
+# payload is preceded by its u32 little-endian byte count so the
+# subscriber can split the concatenation back into frames
+_BATCH_LEN_STRUCT = struct.Struct('<I')
+
 class UARTMQTTPublisher(UARTReceiver):
     # UART Protocol Constants - Matching C definitions
     HEADER_MAGIC = b'\x55\x55\x55\x55'
@@ -22,25 +66,30 @@ class UARTMQTTPublisher(UARTReceiver):
     DEVICE_LENGTH = 42  # 6 + 1 + 1 + 1 + 1 + 31 + 1 = 42 bytes
     MAX_DEVICES = 64  # Match HASH_SIZE from C code (64)
     SAMPLING_INTERVAL = 5.0  # Match SAMPLING_INTERVAL_MS from C code (5000ms)
+    MAX_INFLIGHT = 20  # QoS 1: unconfirmed publishes allowed before blocking
+    SUMMARY_INTERVAL = 60.0  # Seconds between INFO publish summaries
 
     def __init__(self, port='/dev/ttyUSB0', baudrate=115200,
                  mqtt_broker="localhost", mqtt_port=1883,
                  mqtt_topic="admin/reader", mqtt_username=None, mqtt_password=None,
-                 log_level="info"):
+                 mqtt_qos=0, batch_count=1, batch_window_ms=1000,
+                 inline_mqtt_loop=False, payload_format='raw', log_level="info"):
         """Initialize UART receiver with MQTT publisher"""
-        # Setup logging first
+        # Setup logging first (it emits the start banner)
         self._setup_logging(log_level)
-        self.logger.info(f"Script started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        # Initialize serial port with a 1-second timeout so that read(n) will wait for complete data
+
+        # Initialize serial port with a timeout spanning two sampling
+        # intervals: read(n) blocks in the kernel until data arrives instead
+        # of the loop busy-polling with short sleeps
         try:
             self.serial = serial.Serial(
                 port=port,
                 baudrate=baudrate,
-                timeout=1  # Blocking reads with 1 sec timeout
+                timeout=2 * self.SAMPLING_INTERVAL
             )
             self.logger.info(f"Opened serial port {port} at {baudrate} baud")
-            
+            self._tune_serial_port()
+
             # Flush any existing data
             self.serial.reset_input_buffer()
             self.serial.reset_output_buffer()
@@ -53,12 +102,74 @@ class UARTMQTTPublisher(UARTReceiver):
         self.baudrate = baudrate
         self.running = True
         self.mqtt_topic = mqtt_topic
+        # paho UTF-8-encodes a str topic on every publish; hand it the
+        # encoded bytes once instead
+        self._topic_bytes = mqtt_topic.encode('utf-8')
+        # QoS 0 by default: raw scan buffers are best-effort telemetry and
+        # skipping the per-message PUBACK round-trip keeps bursts cheap.
+        # Use QoS 1 only when delivery of every buffer matters.
+        self.mqtt_qos = mqtt_qos
+
+        # Async-confirm tracking for QoS 1: publishes go out back-to-back
+        # and only block when MAX_INFLIGHT PUBACKs are outstanding, instead
+        # of stalling on a round-trip per message
+        self._inflight = set()
+        self._early_acks = set()
+        # mid -> payload for unconfirmed publishes, so a stalled window can
+        # be re-published instead of silently dropped (bounded by the
+        # MAX_INFLIGHT window)
+        self._outbox = {}
+        self._inflight_cond = threading.Condition()
+        # Stalled-window payloads are parked here and re-published from the
+        # receive loop; publishing from _track_inflight itself would nest
+        # publish -> track -> publish without bound during a broker outage
+        self._retry_payloads = []
+
+        # Optional aggregation: with batch_count > 1 completed buffers are
+        # length-prefixed and concatenated so one publish amortizes the
+        # TCP/MQTT round-trip over the whole batch
+        self.batch_count = batch_count
+        self.batch_window_ms = batch_window_ms
+        self._pending = []
+        self._pending_docs = []
+        self._batch_deadline = None
+        # Reusable batch wrapper: only the timestamp value changes per
+        # flush, so the dict (and its interned keys) is built once
+        self._batch_doc = {'timestamp': 0.0, 'batch': self._pending_docs}
+
+        # Inline loop mode services paho's socket from the reader thread
+        # (loop_write right after publish, loop(0) between frames) instead
+        # of spawning the network thread — the PUBLISH bytes hit the kernel
+        # before the next UART read, with no per-message context switch
+        self.inline_mqtt_loop = inline_mqtt_loop
+
+        # 'raw' forwards the UART frame untouched (the subscriber parses);
+        # the other formats parse here and publish a self-describing
+        # document in the chosen encoding
+        self.payload_format = payload_format
+        if payload_format == 'msgpack' and msgpack is None:
+            raise RuntimeError("--payload-format msgpack requires the msgpack package")
+        if payload_format == 'cbor' and cbor2 is None:
+            raise RuntimeError("--payload-format cbor requires the cbor2 package")
+
+        # Scan buffer for frame synchronization: serial data is read in bulk
+        # chunks and the header magic is located with bytes.find instead of
+        # one read() syscall per byte
+        self._scan_buf = bytearray()
+
+        # Preallocated frame buffer reused across reads; readinto() places
+        # device bytes directly here instead of allocating fresh bytes
+        # objects for every frame
+        self._rx_buf = bytearray(self.HEADER_LENGTH + self.MAX_DEVICES * self.DEVICE_LENGTH)
+        self._rx_view = memoryview(self._rx_buf)
         
-        # Add signal handlers
-        signal.signal(signal.SIGTERM, self.signal_handler)
-        signal.signal(signal.SIGINT, self.signal_handler)
-        signal.signal(signal.SIGHUP, self.signal_handler)
-        signal.signal(signal.SIGQUIT, self.signal_handler)
+        # Add signal handlers. SIGHUP/SIGQUIT do not exist on Windows, so
+        # resolve each by name; skip signals some embedding application has
+        # already claimed instead of silently replacing its handler
+        for sig_name in ('SIGTERM', 'SIGINT', 'SIGHUP', 'SIGQUIT'):
+            sig = getattr(signal, sig_name, None)
+            if sig is not None and signal.getsignal(sig) in (signal.SIG_DFL, signal.default_int_handler):
+                signal.signal(sig, self.signal_handler)
         
         # Setup MQTT Client
         try:
@@ -71,10 +182,19 @@ class UARTMQTTPublisher(UARTReceiver):
             self.mqtt_client.on_connect = self.on_mqtt_connect
             self.mqtt_client.on_disconnect = self.on_mqtt_disconnect
             self.mqtt_client.on_publish = self.on_mqtt_publish
+
+            # Keep the pipe full during bursts: allow a window of in-flight
+            # QoS>0 messages and never drop queued ones
+            self.mqtt_client.max_inflight_messages_set(self.MAX_INFLIGHT)
+            self.mqtt_client.max_queued_messages_set(0)
             
             self.logger.info(f"Connecting to MQTT broker at {mqtt_broker}:{mqtt_port}")
             self.mqtt_client.connect(mqtt_broker, mqtt_port, 60)
-            self.mqtt_client.loop_start()
+            if self.inline_mqtt_loop:
+                # Complete the CONNECT/CONNACK exchange before streaming
+                self.mqtt_client.loop(timeout=1.0)
+            else:
+                self.mqtt_client.loop_start()
             self.logger.info("MQTT client setup complete")
         except Exception as e:
             self.logger.error(f"Error connecting to MQTT broker: {e}")
@@ -83,14 +203,19 @@ class UARTMQTTPublisher(UARTReceiver):
     def _setup_logging(self, log_level):
         """Configure logging system"""
         log_dir = "logs"
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-            
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # exist_ok collapses the exists/makedirs pair into one syscall
+        Path(log_dir).mkdir(exist_ok=True)
+
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
         log_file = os.path.join(log_dir, f"uart_mqtt_{timestamp}.log")
         
         self.logger = logging.getLogger('UART_MQTT_Publisher')
         self.logger.setLevel(logging.DEBUG)
+        # The named logger is process-global: drop handlers left by a
+        # previous instance and keep records away from the root logger so
+        # nothing is emitted (or formatted) twice
+        self.logger.handlers.clear()
+        self.logger.propagate = False
         
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
         file_handler.setLevel(logging.INFO)
@@ -102,34 +227,57 @@ class UARTMQTTPublisher(UARTReceiver):
         
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
-        
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
-        
-        self.logger.info(f"Script started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+        # The hot reception path only enqueues log records; the listener
+        # thread owns the actual file/console handlers so disk I/O never
+        # blocks the UART loop
+        # SimpleQueue: reentrant-safe and cheaper than Queue (no task
+        # tracking), which is all the handler hand-off needs
+        log_queue = queue.SimpleQueue()
+        self.logger.addHandler(QueueHandler(log_queue))
+        self._log_listener = QueueListener(log_queue, file_handler, console_handler,
+                                           respect_handler_level=True)
+        self._log_listener.start()
+
+        self.logger.info("Script started: %s", time.strftime(_TS_FMT))
 
     def _check_crash_recovery(self):
         """Check for unexpected termination"""
         log_dir = "logs"
-        if os.path.exists(log_dir):
-            log_files = sorted(
-                [f for f in os.listdir(log_dir) if f.startswith("uart_mqtt_")],
-                reverse=True
-            )
-            if log_files:
-                last_log = os.path.join(log_dir, log_files[0])
-                try:
-                    with open(last_log, 'r') as f:
-                        last_lines = f.readlines()[-3:]
-                        if not any("Script finished" in line for line in last_lines):
-                            self.logger.warning("Detected unexpected termination in previous run")
-                except Exception:
-                    pass
+        try:
+            # One scandir pass for the newest log; DirEntry.stat() is cached
+            # so no extra stat syscalls, and no file list is materialized
+            with os.scandir(log_dir) as entries:
+                latest = max(
+                    (e for e in entries if e.name.startswith("uart_mqtt_")),
+                    key=lambda e: e.stat().st_mtime,
+                    default=None
+                )
+            if latest is None:
+                return
+            # Read a bounded tail instead of readlines() on the whole log,
+            # which scales startup time and memory with the previous run
+            with open(latest.path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                f.seek(max(0, f.tell() - 4096))
+                tail = f.read().decode('utf-8', 'replace')
+            if "Script finished" not in tail:
+                self.logger.warning("Detected unexpected termination in previous run")
+        except OSError:
+            pass
 
     def on_mqtt_connect(self, client, userdata, flags, reason_code, properties):
         """Callback for when the client receives a CONNACK response from the server"""
         if reason_code == 0:
             self.logger.info("Connected to MQTT Broker successfully")
+            # Disable Nagle's algorithm so small PUBLISH packets are not
+            # coalesced (~40ms of added latency otherwise)
+            try:
+                sock = client.socket()
+                if sock is not None:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except (OSError, AttributeError) as e:
+                self.logger.warning(f"Could not set TCP_NODELAY: {e}")
         else:
             self.logger.error(f"Failed to connect to MQTT Broker with code: {reason_code}")
 
@@ -142,26 +290,219 @@ class UARTMQTTPublisher(UARTReceiver):
     def on_mqtt_publish(self, client, userdata, mid, reason_code=0, properties=None):
         """Callback for when a message is published"""
         if reason_code == 0:
-            self.logger.debug(f"Message {mid} published successfully")
+            self.logger.debug("Message %s published successfully", mid)
         else:
-            self.logger.warning(f"Message {mid} failed to publish with reason code: {reason_code}")
+            self.logger.warning("Message %s failed to publish with reason code: %s", mid, reason_code)
+        with self._inflight_cond:
+            if mid in self._inflight:
+                self._inflight.discard(mid)
+                self._outbox.pop(mid, None)
+                self._inflight_cond.notify()
+            else:
+                # PUBACK arrived before _publish_buffer registered the mid
+                self._early_acks.add(mid)
+
+    def _service_inline_loop(self, timeout=0):
+        """Run paho's loop() once and revive the connection if it died
+
+        Bare loop() never reconnects (loop_start's thread handles that in
+        threaded mode): after a broker drop it no-ops forever and every
+        publish returns MQTT_ERR_NO_CONN, so a non-success rc triggers a
+        reconnect attempt here.
+        """
+        rc = self.mqtt_client.loop(timeout=timeout)
+        if rc != mqtt.MQTT_ERR_SUCCESS:
+            self.logger.warning("MQTT loop returned rc=%d; reconnecting", rc)
+            try:
+                self.mqtt_client.reconnect()
+            except Exception as e:
+                self.logger.error("Reconnect failed: %s", e)
+                # Pace retries: the caller loops continuously, so without
+                # this a dead broker is hammered every iteration
+                time.sleep(1)
 
     def _publish_buffer(self, raw_data):
         """Publish the raw buffer immediately to MQTT topic"""
         try:
-            self.logger.debug(f"Publishing buffer of {len(raw_data)} bytes")
-            result = self.mqtt_client.publish(self.mqtt_topic, raw_data, qos=1)
+            # Lazy %-formatting: the string is only built if DEBUG is emitted
+            self.logger.debug("Publishing buffer of %d bytes", len(raw_data))
+            # paho only takes bytes/bytearray; memoryviews of the rx buffer
+            # are materialized here, at the last possible moment
+            if not isinstance(raw_data, (bytes, bytearray)):
+                raw_data = bytes(raw_data)
+            result = self.mqtt_client.publish(self._topic_bytes, raw_data, qos=self.mqtt_qos)
             
             if result.rc == mqtt.MQTT_ERR_SUCCESS:
+                if self.inline_mqtt_loop:
+                    # Flush the PUBLISH to the socket now rather than when
+                    # a network thread would next wake
+                    self.mqtt_client.loop_write()
+                if self.mqtt_qos:
+                    self._track_inflight(result.mid, raw_data)
                 self.logger.debug("Buffer published successfully")
                 return True
             else:
-                self.logger.error(f"Error publishing message: {result.rc}")
+                self.logger.error("Error publishing message: %s", result.rc)
                 return False
         except Exception as e:
-            self.logger.error(f"Error publishing to MQTT: {e}")
+            self.logger.error("Error publishing to MQTT: %s", e)
             return False
 
+    def _build_document(self, header, device_view, with_timestamp=True):
+        """Build the publish document for a parsed buffer
+
+        Batched documents skip the per-buffer timestamp; the batch root
+        carries one snapshot for the nearly simultaneous buffers instead.
+        """
+        # One pass, one pre-sized list: _parse_device already emits the
+        # publish-ready shape, so no per-device re-wrap
+        devices = [
+            d for d in (
+                self._parse_device(
+                    device_view[i * self.DEVICE_LENGTH:(i + 1) * self.DEVICE_LENGTH]
+                )
+                for i in range(header['n_mac'])
+            ) if d
+        ]
+        document = {
+            'sequence': header['sequence'],
+            'n_adv_raw': header['n_adv_raw'],
+            'n_mac': header['n_mac'],
+            'devices': devices
+        }
+        if with_timestamp:
+            # Epoch seconds: no datetime object or ISO formatting per
+            # buffer, and a float serializes several times faster than
+            # the string
+            document['timestamp'] = time.time()
+        return document
+
+    def _serialize_document(self, document):
+        """Encode a document in the configured payload format"""
+        if self.payload_format == 'msgpack':
+            return msgpack.packb(document, use_bin_type=True)
+        if self.payload_format == 'cbor':
+            return cbor2.dumps(document)
+        return _json_dumps(document)
+
+    def _enqueue_document(self, document):
+        """Queue a document, flushing when the count or window threshold hits"""
+        now = time.monotonic()
+        if not self._pending_docs:
+            self._batch_deadline = now + self.batch_window_ms / 1000.0
+        self._pending_docs.append(document)
+        if len(self._pending_docs) >= self.batch_count or now >= self._batch_deadline:
+            return self._flush_documents()
+        return True
+
+    def _flush_documents(self):
+        """Publish all queued documents as one JSON batch payload"""
+        if not self._pending_docs:
+            return True
+        # One timestamp snapshot covers the whole batch; the wrapper dict
+        # is reused across flushes and references _pending_docs directly
+        self._batch_doc['timestamp'] = time.time()
+        payload = self._serialize_document(self._batch_doc)
+        self._pending_docs.clear()
+        return self._publish_buffer(payload)
+
+    def _enqueue_buffer(self, raw_data):
+        """Queue a framed buffer, flushing when the count or window threshold hits"""
+        now = time.monotonic()
+        if not self._pending:
+            self._batch_deadline = now + self.batch_window_ms / 1000.0
+        # bytes() here snapshots the view before the rx buffer is reused
+        self._pending.append(_BATCH_LEN_STRUCT.pack(len(raw_data)) + bytes(raw_data))
+        if len(self._pending) >= self.batch_count or now >= self._batch_deadline:
+            return self._flush_batch()
+        return True
+
+    def _flush_batch(self):
+        """Publish all queued buffers as a single length-prefixed payload"""
+        if not self._pending:
+            return True
+        payload = b''.join(self._pending)
+        self._pending.clear()
+        return self._publish_buffer(payload)
+
+    def _track_inflight(self, mid, payload=None):
+        """Register a QoS 1 publish and block only when the confirm window is full"""
+        stale = None
+        with self._inflight_cond:
+            if mid in self._early_acks:
+                self._early_acks.discard(mid)
+                return
+            self._inflight.add(mid)
+            if payload is not None:
+                self._outbox[mid] = payload
+            stall_deadline = time.monotonic() + 2 * self.SAMPLING_INTERVAL
+            while len(self._inflight) >= self.MAX_INFLIGHT:
+                if self.inline_mqtt_loop:
+                    # Inline mode reads PUBACKs on this very thread, so a
+                    # bare condition wait could never be signalled: pump
+                    # the network loop until the window drains (the
+                    # condition's RLock lets on_publish re-enter here),
+                    # reconnecting first if the connection dropped
+                    self._service_inline_loop(timeout=0.1)
+                    stalled = time.monotonic() >= stall_deadline
+                else:
+                    stalled = not self._inflight_cond.wait(
+                        timeout=2 * self.SAMPLING_INTERVAL)
+                if stalled:
+                    # No PUBACKs for two sampling intervals: re-publish the
+                    # stalled window rather than wedging the reader thread
+                    # or dropping the buffers on the floor
+                    self.logger.warning(
+                        "Re-publishing %d unconfirmed buffers after timeout",
+                        len(self._outbox)
+                    )
+                    stale = list(self._outbox.values())
+                    self._inflight.clear()
+                    self._outbox.clear()
+                    break
+        if stale:
+            # Park for the receive loop: each retry publish re-enters
+            # _track_inflight, which at worst parks again and returns —
+            # the retry stays iterative no matter how long the outage
+            self._retry_payloads.extend(stale)
+
+    def _read_exact(self, size):
+        """Read exactly size bytes, draining the scan buffer before the port"""
+        if self._scan_buf:
+            data = bytes(self._scan_buf[:size])
+            del self._scan_buf[:len(data)]
+        else:
+            data = b""
+        while len(data) < size:
+            chunk = self.serial.read(size - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def _tune_serial_port(self):
+        """Best-effort kernel-side tuning of the freshly opened port.
+
+        USB-serial adapters (FTDI and friends) batch reads behind a 16 ms
+        latency_timer by default, which delays every small header/device
+        read. Low-latency mode drops that to 1 ms. Also grows the driver
+        receive buffer so a whole burst arrives in one kernel-to-user copy.
+        """
+        try:
+            self.serial.set_low_latency_mode(True)
+            self.logger.info("Serial low-latency mode enabled")
+        except (ValueError, NotImplementedError, OSError) as e:
+            # Not a USB-serial port or unsupported platform; harmless
+            self.logger.debug("Low-latency mode not available: %s", e)
+        try:
+            self.serial.set_buffer_size(rx_size=self.HEADER_LENGTH +
+                                        self.MAX_DEVICES * self.DEVICE_LENGTH)
+        except AttributeError:
+            # Only implemented on Windows; POSIX drivers size themselves
+            pass
+        except Exception as e:
+            self.logger.debug("Could not resize serial buffer: %s", e)
+
     def _reset_serial(self):
         """Reset and reopen serial port with a 20-second timeout"""
         try:
@@ -175,6 +516,7 @@ class UARTMQTTPublisher(UARTReceiver):
                 baudrate=self.baudrate,
                 timeout=20
             )
+            self._tune_serial_port()
             self.serial.reset_input_buffer()
             self.serial.reset_output_buffer()
             self.logger.info("Serial port reopened successfully")
@@ -192,86 +534,173 @@ class UARTMQTTPublisher(UARTReceiver):
         """Receive UART buffers and publish them immediately to MQTT using a combined tracker approach.
         Gracefully handles serial errors by rate limiting log messages.
         """
-        start_time = time.time()
+        # Monotonic deadlines instead of polling the wall clock each loop:
+        # immune to clock jumps and only one clock read per check
+        deadline = time.monotonic() + duration if duration else None
         processed_buffers = 0
-        # Timestamp to control error logging frequency for serial errors.
-        last_serial_error_log = 0  
+        # Rolling aggregate for the rate-limited INFO summary: one line per
+        # SUMMARY_INTERVAL instead of one synchronous write per buffer
+        last_summary = time.monotonic()
+        buffers_since = 0
+        devices_since = 0
+        # Deadline to control error logging frequency for serial errors.
+        next_serial_error_log = 0
         error_log_interval = 5  # seconds
 
         self.logger.info("Starting combined capture of BLE messages...")
-        self.logger.debug(f"Expecting data every {self.SAMPLING_INTERVAL} seconds")
+        self.logger.debug("Expecting data every %s seconds", self.SAMPLING_INTERVAL)
 
         while self.running:
             try:
-                if duration and (time.time() - start_time) >= duration:
+                if deadline is not None and time.monotonic() >= deadline:
                     self.logger.info(f"Execution time ({duration}s) completed")
                     break
 
+                if self.inline_mqtt_loop:
+                    # Service PUBACKs/keepalive without a second thread
+                    self._service_inline_loop(timeout=0)
+
+                if self._retry_payloads:
+                    # Re-publish anything a stalled QoS window parked
+                    retries, self._retry_payloads = self._retry_payloads, []
+                    for payload in retries:
+                        self._publish_buffer(payload)
+
                 # --- Wait for header magic ---
-                # Loop until we find the header start (0x55 x4)
-                while True:
-                    byte = self.serial.read(1)
-                    if not byte:
-                        time.sleep(0.05)
-                        continue
-                    if byte == b'\x55':
-                        potential_header = byte + self.serial.read(3)
-                        if potential_header == self.HEADER_MAGIC:
+                # Scan whatever is already buffered before blocking in
+                # read(): a multi-frame drain leaves the next frame sitting
+                # in _scan_buf. Consumption deletes from the front, so
+                # offsets from earlier searches mean nothing — always search
+                # from 0; the buffer is truncated to a 3-byte tail whenever
+                # no magic is found, which bounds the rescan cost
+                while self.running:
+                    idx = self._scan_buf.find(self.HEADER_MAGIC)
+                    if idx >= 0:
+                        # Discard any garbage before the magic
+                        del self._scan_buf[:idx]
+                        # Guarded: keep the per-frame call site free at INFO
+                        if self.logger.isEnabledFor(logging.DEBUG):
                             self.logger.debug("Cabecera UART encontrada")
-                            break
+                        break
+                    # No magic: drop the garbage but keep a 3-byte tail in
+                    # case the magic is split across chunks, so the buffer
+                    # cannot grow without bound during sync loss
+                    del self._scan_buf[:-3]
+                    chunk = self.serial.read(max(1, self.serial.in_waiting))
+                    if not chunk:
+                        # Blocking read timed out; nothing to scan yet
+                        continue
+                    self._scan_buf += chunk
 
                 # --- Read and parse the rest of the header ---
-                header_rest = self.serial.read(self.HEADER_LENGTH - 4)
-                if len(header_rest) != self.HEADER_LENGTH - 4:
+                header_data = self._read_exact(self.HEADER_LENGTH)
+                if len(header_data) != self.HEADER_LENGTH:
                     self.logger.warning("Incomplete header received")
                     continue
-                header_data = potential_header + header_rest
                 header = self._parse_header(header_data)
                 if not header:
                     self.logger.warning("Error parsing header")
                     continue
-                self.logger.debug(f"Header parsed: {header}")
+                # Stage the header at the front of the preallocated frame
+                # buffer so the published frame never needs a concatenation
+                self._rx_view[:self.HEADER_LENGTH] = header_data
+                self.logger.debug("Header parsed: %s", header)
 
                 # --- Read all device data ---
+                if header['n_mac'] > self.MAX_DEVICES:
+                    self.logger.warning("Invalid device count in header: %d", header['n_mac'])
+                    continue
                 expected_device_bytes = header['n_mac'] * self.DEVICE_LENGTH
-                device_data = b""
-                while len(device_data) < expected_device_bytes:
-                    chunk = self.serial.read(expected_device_bytes - len(device_data))
-                    if not chunk:
-                        time.sleep(0.05)
-                        continue
-                    device_data += chunk
-                if len(device_data) != expected_device_bytes:
+                # Fill the preallocated frame buffer in place: drain the scan
+                # buffer first, then readinto() for the rest — no per-chunk
+                # bytes allocations
+                device_view = self._rx_view[self.HEADER_LENGTH:
+                                            self.HEADER_LENGTH + expected_device_bytes]
+                received = min(len(self._scan_buf), expected_device_bytes)
+                device_view[:received] = self._scan_buf[:received]
+                del self._scan_buf[:received]
+                if received < expected_device_bytes:
+                    # One-shot: with the blocking timeout configured, read/
+                    # readinto waits for the full remainder or the timeout —
+                    # no retry loop needed, just a post-condition check
+                    received += self.serial.readinto(device_view[received:]) or 0
+                if received != expected_device_bytes:
                     self.logger.warning(
-                        f"Incomplete device data: got {len(device_data)} bytes, expected {expected_device_bytes}"
+                        "Incomplete device data: got %d bytes, expected %d",
+                        received, expected_device_bytes
                     )
                     continue
+                # Zero-copy view of the frame: header and devices already sit
+                # contiguously in the preallocated buffer, so nothing is
+                # copied until the MQTT/batch boundary
+                complete_buffer = self._rx_view[:self.HEADER_LENGTH + expected_device_bytes]
 
-                # Combine header and device data to form the complete buffer
-                complete_buffer = header_data + device_data
+                # Debug-only device decode: the forwarding path never parses
+                # records, and python -O strips this block entirely
+                if __debug__ and self.logger.isEnabledFor(logging.DEBUG):
+                    for i in range(header['n_mac']):
+                        dev = self._parse_device(
+                            device_view[i * self.DEVICE_LENGTH:(i + 1) * self.DEVICE_LENGTH]
+                        )
+                        self.logger.debug("Device %d: %s", i + 1, dev)
 
-                # --- Publish the complete buffer ---
-                if self._publish_buffer(complete_buffer):
+                # --- Publish the complete buffer (batched if enabled) ---
+                if self.payload_format != 'raw':
+                    document = self._build_document(
+                        header, device_view,
+                        with_timestamp=self.batch_count <= 1
+                    )
+                    if self.batch_count > 1:
+                        # Many documents per publish: one {'batch': [...]}
+                        # payload amortizes the broker round-trip
+                        published = self._enqueue_document(document)
+                    else:
+                        published = self._publish_buffer(
+                            self._serialize_document(document)
+                        )
+                elif self.batch_count > 1:
+                    published = self._enqueue_buffer(complete_buffer)
+                else:
+                    published = self._publish_buffer(complete_buffer)
+                if published:
                     processed_buffers += 1
-                    self.logger.info(
-                        f"Published buffer #{processed_buffers} with {header['n_mac']} devices"
+                    buffers_since += 1
+                    devices_since += header['n_mac']
+                    self.logger.debug(
+                        "Published buffer #%d with %d devices",
+                        processed_buffers, header['n_mac']
                     )
+                    now = time.monotonic()
+                    if now - last_summary >= self.SUMMARY_INTERVAL:
+                        self.logger.info(
+                            "Last %.0fs: %d buffers, %d devices published",
+                            now - last_summary, buffers_since, devices_since
+                        )
+                        last_summary = now
+                        buffers_since = 0
+                        devices_since = 0
                 else:
                     self.logger.warning("Failed to publish buffer")
 
             except serial.SerialException as e:
-                now = time.time()
-                if now - last_serial_error_log > error_log_interval:
-                    self.logger.error(f"Serial error: {e}")
-                    last_serial_error_log = now
+                now = time.monotonic()
+                if now >= next_serial_error_log:
+                    self.logger.error("Serial error: %s", e)
+                    next_serial_error_log = now + error_log_interval
                 time.sleep(0.1)
                 continue
 
             except Exception as e:
-                self.logger.error(f"Unexpected error: {e}")
+                self.logger.error("Unexpected error: %s", e)
                 time.sleep(1)
                 continue
 
+        # Ship whatever is still waiting for its batch window
+        if self.batch_count > 1:
+            if self.payload_format != 'raw':
+                self._flush_documents()
+            else:
+                self._flush_batch()
         self.logger.info(f"Total buffers processed: {processed_buffers}")
 
     def close(self):
@@ -287,55 +716,62 @@ class UARTMQTTPublisher(UARTReceiver):
             except Exception as mqtt_e:
                 self.logger.error(f"Error disconnecting MQTT: {mqtt_e}")
 
-            self.logger.info(f"Script finished: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            self.logger.info("Script finished: %s", time.strftime(_TS_FMT))
         except Exception as e:
             self.logger.error(f"Error closing connections: {e}")
+        finally:
+            # Flush queued records and stop the listener thread last so the
+            # shutdown messages above still reach the log file
+            if hasattr(self, '_log_listener'):
+                self._log_listener.stop()
 
     def _parse_header(self, data):
         """Parse UART header data with new format"""
         try:
             if len(data) != self.HEADER_LENGTH:
                 return None
-            
-            # Parse using uint16_t for n_adv_raw and n_mac
-            sequence = int.from_bytes(data[4:5], byteorder='little')
-            n_adv_raw = int.from_bytes(data[5:7], byteorder='little')  # 2 bytes
-            n_mac = int.from_bytes(data[7:8], byteorder='little')      # 1 byte
-            
+
+            # Single unpack for all fields (uint16_t n_adv_raw, uint8_t n_mac)
+            _, sequence, n_adv_raw, n_mac = _HEADER_STRUCT.unpack(data)
+
             return {
                 'sequence': sequence,
                 'n_adv_raw': n_adv_raw,
                 'n_mac': n_mac
             }
         except Exception as e:
-            self.logger.error(f"Error parsing header: {e}")
+            self.logger.error("Error parsing header: %s", e)
             return None
 
     def _parse_device(self, data):
-        """Parse device data from UART"""
+        """Parse device data from UART (debug logging only).
+
+        The hot path forwards the raw buffer untouched; decoding individual
+        records is the subscriber's job. Keep this out of receive_messages
+        except behind the __debug__/DEBUG guard.
+        """
         try:
             if len(data) != self.DEVICE_LENGTH:
                 return None
-            
-            mac = ':'.join([f"{b:02X}" for b in data[0:6]])
-            addr_type = int.from_bytes(data[6:7], byteorder='little')
-            adv_type = int.from_bytes(data[7:8], byteorder='little')
-            rssi = int.from_bytes(data[8:9], byteorder='little', signed=True)
-            data_len = int.from_bytes(data[9:10], byteorder='little')
-            adv_data = data[10:26]  # 16 bytes of data
-            n_adv = int.from_bytes(data[26:27], byteorder='little')
-            
+
+            (mac_bytes, addr_type, adv_type, rssi,
+             data_len, adv_data, n_adv) = _DEVICE_STRUCT.unpack(data)
+            # bytes.hex does the colon-separated formatting in a single C call
+            mac = mac_bytes.hex(':').upper()
+
             return {
                 'mac': mac,
                 'addr_type': addr_type,
                 'adv_type': adv_type,
                 'rssi': rssi,
                 'data_len': data_len,
-                'data': adv_data,
+                # Hex string directly: publish-/log-ready, no second pass
+                # over the devices to re-encode raw bytes
+                'data': adv_data.hex(),
                 'n_adv': n_adv
             }
         except Exception as e:
-            self.logger.error(f"Error parsing device data: {e}")
+            self.logger.error("Error parsing device data: %s", e)
             return None
 
 if __name__ == "__main__":
@@ -357,6 +793,23 @@ if __name__ == "__main__":
                         help='MQTT username (optional)')
     parser.add_argument('--mqtt-password', type=str,
                         help='MQTT password (optional)')
+    parser.add_argument('--mqtt-qos', type=int,
+                        choices=[0, 1],
+                        default=0,
+                        help='MQTT QoS for raw buffers (default: 0, best effort)')
+    parser.add_argument('--batch-count', type=int,
+                        default=1,
+                        help='Buffers aggregated per publish (default: 1, no batching)')
+    parser.add_argument('--batch-window-ms', type=int,
+                        default=1000,
+                        help='Max wait in ms before a partial batch is flushed (default: 1000)')
+    parser.add_argument('--payload-format', type=str,
+                        choices=['raw', 'json', 'msgpack', 'cbor'],
+                        default='raw',
+                        help='Publish raw UART frames or parsed documents as '
+                             'json/msgpack/cbor (default: raw)')
+    parser.add_argument('--inline-mqtt-loop', action='store_true',
+                        help='Service the MQTT socket from the reader loop instead of a network thread')
     parser.add_argument('--log-level', type=str,
                         choices=['info', 'debug'],
                         default='info',
@@ -372,6 +825,11 @@ if __name__ == "__main__":
             mqtt_topic=args.mqtt_topic,
             mqtt_username=args.mqtt_username,
             mqtt_password=args.mqtt_password,
+            mqtt_qos=args.mqtt_qos,
+            batch_count=args.batch_count,
+            batch_window_ms=args.batch_window_ms,
+            inline_mqtt_loop=args.inline_mqtt_loop,
+            payload_format=args.payload_format,
             log_level=args.log_level
         )
         publisher.logger.info("Starting capture %s", 
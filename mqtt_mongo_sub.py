@@ -1,9 +1,22 @@
 import paho.mqtt.client as mqtt
-from pymongo import MongoClient
+from pymongo import MongoClient, WriteConcern
+from bson import encode
+from bson.binary import Binary
+from bson.raw_bson import RawBSONDocument
 import json
 import argparse
+
+# orjson parses bytes directly (no .decode() step) and is several times
+# faster than the stdlib decoder; fall back transparently if missing
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
 import logging
+from logging.handlers import QueueHandler, QueueListener
 import os
+import struct
+from pathlib import Path
 from datetime import datetime
 import signal
 import sys
@@ -12,17 +25,43 @@ import time
 import queue
 import threading
 
+# Precompiled layouts: one C-level unpack per header/device instead of
+# per-field slicing and int.from_bytes calls
+_HEADER_STRUCT = struct.Struct('<4sBHB')
+_DEVICE_STRUCT = struct.Struct('<6sBBbB31sB')
+
+# Magic as one machine word; 0x55555555 reads the same on either
+# endianness so a cast('I') compare is byte-order safe
+_MAGIC_U32 = 0x55555555
+
+# u32 frame-length prefix used by the publisher's --batch-count mode
+# (must match mqtt_mongo_pub's _BATCH_LEN_STRUCT)
+_BATCH_LEN_STRUCT = struct.Struct('<I')
+
+# Bulk layouts specialized per device count, built lazily: one unpack
+# call decodes a whole n-device blob. n_mac is bounded by MAX_DEVICES,
+# so the cache stays small.
+_BULK_DEVICE_STRUCTS = {}
+
+
+def _bulk_device_struct(n):
+    bulk = _BULK_DEVICE_STRUCTS.get(n)
+    if bulk is None:
+        bulk = _BULK_DEVICE_STRUCTS[n] = struct.Struct('<' + '6sBBbB31sB' * n)
+    return bulk
+
 class MQTTMongoSubscriber:
     # UART Protocol Constants - Matching C definitions
     HEADER_MAGIC = b'\x55\x55\x55\x55'
     HEADER_LENGTH = 8  # 4 (magic) + 1 (sequence) + 2 (n_adv_raw) + 1 (n_mac)
     DEVICE_LENGTH = 42  # 6 + 1 + 1 + 1 + 1 + 31 + 1 = 42 bytes
     MAX_DEVICES = 50
+    MAX_QUEUED = 10000  # bound on messages waiting for the Mongo worker
 
     def __init__(self, mqtt_broker="localhost", mqtt_port=1883,
                  mqtt_topic="admin/reader", mqtt_username=None, mqtt_password=None,
                  mongo_uri="mongodb://localhost:27017/",
-                 log_level="info"):
+                 mongo_direct=False, codec='binary', log_level="info"):
         """Initialize MQTT subscriber with MongoDB connection
         Expects messages with updated format supporting up to 50 devices.
         Header format:
@@ -33,8 +72,20 @@ class MQTTMongoSubscriber:
         """
         self.running = True
         self.mqtt_topic = mqtt_topic
+        self.mongo_direct = mongo_direct
+        # Pluggable payload codec: the raw UART framing and the
+        # publisher's --payload-format json mode share everything else
+        # (logging, Mongo batching, MQTT loop), so the decode step is the
+        # only thing that varies per topic
+        if codec == 'binary':
+            self._decode = self._decode_binary
+        elif codec == 'json':
+            self._decode = self._decode_json
+        else:
+            raise ValueError(f"Unknown codec: {codec}")
         self.messages_received = 0
         self.devices_processed = 0
+        self.dropped_messages = 0
         
         # Add signal handlers based on platform
         signal.signal(signal.SIGTERM, self.signal_handler)
@@ -50,13 +101,27 @@ class MQTTMongoSubscriber:
         
         # Connect to MongoDB
         try:
+            # One writer thread only needs a couple of sockets; minPoolSize
+            # keeps them established so no insert pays connection setup.
+            # Compression is negotiated down to whatever the server and
+            # installed libs support (zlib is always available).
             self.mongo_client = MongoClient(mongo_uri,
                                             serverSelectionTimeoutMS=5000,
                                             connectTimeoutMS=5000,
-                                            socketTimeoutMS=5000)
-            self.mongo_client.server_info()  # Test connection
+                                            socketTimeoutMS=5000,
+                                            maxPoolSize=4,
+                                            minPoolSize=2,
+                                            compressors='zstd,snappy,zlib')
+            self.mongo_client.server_info()  # Test connection and warm the pool
             self.db = self.mongo_client.ble_scanner
-            self.collection = self.db.session3
+            if mongo_direct:
+                # Fire-and-forget writes: with w=0 the insert returns as
+                # soon as the bytes hit the socket, so inserting on the
+                # paho thread does not stall message reception
+                self.collection = self.db.get_collection(
+                    'session3', write_concern=WriteConcern(w=0))
+            else:
+                self.collection = self.db.session3
             self.logger.info(f"Connected to MongoDB at {mongo_uri}")
         except Exception as e:
             self.logger.error(f"Error connecting to MongoDB: {e}")
@@ -83,17 +148,32 @@ class MQTTMongoSubscriber:
             self.logger.error(f"Error connecting to MQTT broker: {e}")
             raise
 
-        # Create a thread-safe queue and start a background worker for immediate MongoDB inserts.
-        self.message_queue = queue.Queue()
-        self.mongo_worker = threading.Thread(target=self._process_messages, daemon=True)
-        self.mongo_worker.start()
+        # Start a background worker for MongoDB inserts. SimpleQueue is
+        # C-implemented with no mutex/condvar or unfinished-task
+        # bookkeeping per put/get — plenty for this single-producer
+        # (paho thread) / single-consumer (mongo worker) handoff.
+        self.message_queue = queue.SimpleQueue()
+        if mongo_direct:
+            # Direct mode skips the queue/worker entirely: two fewer
+            # context switches per message
+            self.mongo_worker = None
+        else:
+            self.mongo_worker = threading.Thread(target=self._process_messages, daemon=True)
+            self.mongo_worker.start()
 
     def _setup_logging(self, log_level):
         """Configure logging system"""
         log_dir = "logs"
-        if not os.path.exists(log_dir):
-            os.makedirs(log_dir)
-            
+        # exist_ok collapses the exists/makedirs pair into one syscall
+        Path(log_dir).mkdir(exist_ok=True)
+
+        # Skip thread/process id capture per record (~2 syscalls each);
+        # nothing in our format strings uses them
+        logging.logThreads = False
+        logging.logProcesses = False
+        logging.logMultiprocessing = False
+
+
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         log_file = os.path.join(log_dir, f"mqtt_mongo_{timestamp}.log")
         
@@ -110,10 +190,16 @@ class MQTTMongoSubscriber:
         
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
-        
-        self.logger.addHandler(file_handler)
-        self.logger.addHandler(console_handler)
-        
+
+        # The paho and worker threads only enqueue log records; the
+        # listener thread owns the file/console handlers so disk writes
+        # never block message processing
+        log_queue = queue.SimpleQueue()
+        self.logger.addHandler(QueueHandler(log_queue))
+        self._log_listener = QueueListener(log_queue, file_handler, console_handler,
+                                           respect_handler_level=True)
+        self._log_listener.start()
+
         self.logger.info(f"Script started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
     def on_subscribe(self, client, userdata, mid, reason_codes, properties):
@@ -139,13 +225,12 @@ class MQTTMongoSubscriber:
     def _parse_header(self, data):
         """Parse UART header data"""
         try:
-            if len(data) != self.HEADER_LENGTH:
+            if len(data) < self.HEADER_LENGTH:
                 return None
-            
-            sequence = data[4]  # byte after magic
-            n_adv_raw = int.from_bytes(data[5:7], byteorder='little')
-            n_mac = data[7]
-            
+
+            # All fields in one C call (magic already verified by caller)
+            _, sequence, n_adv_raw, n_mac = _HEADER_STRUCT.unpack_from(data, 0)
+
             return {
                 'sequence': sequence,
                 'n_adv_raw': n_adv_raw,
@@ -155,33 +240,64 @@ class MQTTMongoSubscriber:
             self.logger.error(f"Error parsing header: {e}")
             return None
 
-    def _parse_device(self, data):
-        """Parse device data from UART"""
+    def _parse_device(self, data, offset=0):
+        """Parse one device record at offset within the raw buffer"""
         try:
-            if len(data) != self.DEVICE_LENGTH:
-                return None
-            
-            mac = ':'.join([f"{b:02X}" for b in data[0:6]])
-            addr_type = data[6]
-            adv_type = data[7]
-            rssi = int.from_bytes(data[8:9], byteorder='little', signed=True)
-            data_len = data[9]
-            adv_data = data[10:41]  # 31 bytes of advertisement data
-            n_adv = data[41]
-            
+            # Single unpack straight from the buffer: mac (6), addr_type,
+            # adv_type, rssi (signed), data_len, adv data (31), n_adv
+            (mac_bytes, addr_type, adv_type, rssi,
+             data_len, adv_data, n_adv) = _DEVICE_STRUCT.unpack_from(data, offset)
+
             return {
-                'mac': mac,
+                # bytes.hex does the colon-separated formatting in C — no
+                # per-byte f-string or join temporaries
+                'mac': mac_bytes.hex(':').upper(),
                 'addr_type': addr_type,
                 'adv_type': adv_type,
                 'rssi': rssi,
                 'data_len': data_len,
-                'data': adv_data[:data_len].hex(),  # Only convert actual data
+                'data': Binary(adv_data[:data_len]),  # Only keep actual data
                 'n_adv': n_adv
             }
         except Exception as e:
             self.logger.error(f"Error parsing device data: {e}")
             return None
 
+    def _parse_devices(self, blob):
+        """Decode consecutive 42-byte device records in one C-driven pass
+
+        A Struct specialized for the exact device count decodes the whole
+        blob in a single unpack call, so the only per-record Python work
+        is building the document dict.
+
+        The dicts are deliberately not pooled/reused: ownership passes to
+        the Mongo insert batch, which keeps them alive (and insert adds
+        an _id) until the next insert_many flush, so recycling them here
+        would corrupt in-flight documents. The comprehension already
+        builds the list in one presized C-level pass.
+        """
+        n = len(blob) // self.DEVICE_LENGTH
+        if n == 0:
+            return []
+        flat = _bulk_device_struct(n).unpack(blob)
+        fields = iter(flat)
+        binary = Binary  # local: skips a global lookup per device
+        return [
+            {
+                'mac': mac.hex(':').upper(),
+                'addr_type': addr_type,
+                'adv_type': adv_type,
+                'rssi': rssi,
+                'data_len': data_len,
+                # Raw bytes instead of a hex string: half the BSON size
+                # and no hex-encoding work per device
+                'data': binary(adv_data[:data_len]),
+                'n_adv': n_adv
+            }
+            for mac, addr_type, adv_type, rssi, data_len, adv_data, n_adv
+            in zip(fields, fields, fields, fields, fields, fields, fields)
+        ]
+
     def _parse_buffer(self, raw_data):
         """Parse complete buffer from raw data"""
         try:
@@ -189,8 +305,9 @@ class MQTTMongoSubscriber:
                 self.logger.error("Buffer too short for header")
                 return None
 
-            # Verify header magic
-            if raw_data[:4] != self.HEADER_MAGIC:
+            # Verify header magic: one integer load + compare, no 4-byte
+            # bytes object per message
+            if raw_data[:4].cast('I')[0] != _MAGIC_U32:
                 self.logger.error("Invalid header magic")
                 return None
 
@@ -199,21 +316,16 @@ class MQTTMongoSubscriber:
             if not header:
                 return None
 
-            # Parse devices
-            devices = []
-            offset = self.HEADER_LENGTH
-            for i in range(header['n_mac']):
-                if len(raw_data) < offset + self.DEVICE_LENGTH:
-                    break
-                device_data = raw_data[offset:offset + self.DEVICE_LENGTH]
-                device = self._parse_device(device_data)
-                if device:
-                    devices.append(device)
-                    self.logger.debug(f"Device {i+1} parsed - MAC: {device['mac']}")
-                offset += self.DEVICE_LENGTH
+            # Decode only the complete device records present
+            n_devices = min(header['n_mac'],
+                            (len(raw_data) - self.HEADER_LENGTH) // self.DEVICE_LENGTH)
+            end = self.HEADER_LENGTH + n_devices * self.DEVICE_LENGTH
+            devices = self._parse_devices(raw_data[self.HEADER_LENGTH:end])
 
             return {
-                'timestamp': datetime.now().isoformat(),
+                # int64 epoch nanoseconds: 8 BSON bytes and no ISO string
+                # formatting per message; still indexable/sortable
+                'timestamp': time.time_ns(),
                 **header,
                 'devices': devices
             }
@@ -221,64 +333,164 @@ class MQTTMongoSubscriber:
             self.logger.error(f"Error parsing buffer: {e}")
             return None
 
+    def _decode_binary(self, payload):
+        """Decode a raw payload into a list of frame documents
+
+        A plain frame starts with the header magic; a batched payload
+        (publisher --batch-count > 1) is a sequence of u32-length-prefixed
+        frames, told apart by the prefix not matching the magic. Parses
+        through a memoryview: the header/device reads become zero-copy
+        views into the payload instead of bytes slices.
+        """
+        mv = memoryview(payload)
+        if len(mv) >= 4 and mv[:4].cast('I')[0] == _MAGIC_U32:
+            document = self._parse_buffer(mv)
+            return [document] if document else []
+        # Length-prefixed batch: split and parse each frame
+        documents = []
+        offset = 0
+        total = len(mv)
+        while offset + 4 <= total:
+            (frame_len,) = _BATCH_LEN_STRUCT.unpack_from(mv, offset)
+            offset += 4
+            if frame_len == 0 or offset + frame_len > total:
+                self.logger.error("Malformed batch frame at offset %d", offset - 4)
+                break
+            document = self._parse_buffer(mv[offset:offset + frame_len])
+            if document:
+                documents.append(document)
+            offset += frame_len
+        return documents
+
+    def _decode_json(self, payload):
+        """Decode a JSON payload into a list of frame documents
+
+        A plain document (publisher --payload-format json) already carries
+        timestamp/sequence/devices keys and goes to Mongo as-is; a batch
+        wrapper ({'timestamp', 'batch': [...]}) is split back into one
+        document per frame, each stamped with the batch's shared timestamp.
+        """
+        document = _json_loads(payload)
+        batch = document.get('batch')
+        if batch is None:
+            return [document]
+        timestamp = document.get('timestamp')
+        for doc in batch:
+            doc.setdefault('timestamp', timestamp)
+        return batch
+
     def on_message(self, client, userdata, msg):
         """Callback for when a PUBLISH message is received from the server"""
         try:
-            self.logger.debug(f"Received raw buffer of {len(msg.payload)} bytes")
+            # Lazy %-args: the string is only built if DEBUG is enabled
+            self.logger.debug("Received raw buffer of %d bytes", len(msg.payload))
             self.messages_received += 1
-            
-            # Parse the raw buffer
-            payload = self._parse_buffer(msg.payload)
-            if not payload:
+
+            # One MQTT message may carry several frames (publisher batch
+            # modes); each becomes its own document
+            documents = self._decode(msg.payload)
+            if not documents:
                 raise ValueError("Failed to parse raw buffer")
-            
-            n_devices = len(payload['devices'])
-            self.logger.info(
-                f"Message #{self.messages_received} - "
-                f"Sequence: {payload['sequence']}, "
-                f"Devices: {n_devices}/{self.MAX_DEVICES}, "
-                f"N_ADV_RAW: {payload['n_adv_raw']}"
-            )
-            
-            # Enqueue the parsed payload for MongoDB insertion
-            self.message_queue.put(payload)
+
+            for payload in documents:
+                n_devices = len(payload['devices'])
+                self.logger.info(
+                    "Message #%d - Sequence: %d, Devices: %d/%d, N_ADV_RAW: %d",
+                    self.messages_received, payload['sequence'],
+                    n_devices, self.MAX_DEVICES, payload['n_adv_raw']
+                )
+
+                if self.mongo_direct:
+                    # w=0 write concern makes this non-blocking at the server
+                    self.collection.insert_one(payload)
+                elif self.message_queue.qsize() >= self.MAX_QUEUED:
+                    # Mongo has fallen far behind: shed this message instead
+                    # of growing the queue without bound. The counter is
+                    # reported by the periodic status log.
+                    self.dropped_messages += 1
+                else:
+                    # Encode to BSON here so the worker ships pre-built bytes:
+                    # encoding (C-level _cbson) overlaps the Mongo round-trip
+                    # instead of queueing behind it
+                    self.message_queue.put(RawBSONDocument(encode(payload)))
+                self.devices_processed += n_devices
             
         except Exception as e:
             self.logger.error(f"Error processing message: {e}")
             self.logger.error(f"Raw message length: {len(msg.payload)} bytes")
 
+    MAX_INSERT_BATCH = 500
+
     def _process_messages(self):
-        """Worker thread to immediately insert each received message into MongoDB"""
+        """Worker thread batching queued messages into MongoDB inserts"""
         while self.running or not self.message_queue.empty():
             try:
-                payload = self.message_queue.get(timeout=1)
-                self.collection.insert_one(payload)
-                new_devices = len(payload.get('devices', []))
-                self.devices_processed += new_devices
-                self.logger.info(f"Inserted message: Sequence: {payload.get('sequence', 'N/A')}, Devices: {new_devices}")
+                batch = [self.message_queue.get(timeout=1)]
             except queue.Empty:
                 continue
+            # Drain whatever else is already queued so a burst becomes one
+            # insert_many round-trip instead of one ack per message.
+            # Bound methods hoisted to locals: no attribute walk per item.
+            get_nowait = self.message_queue.get_nowait
+            append = batch.append
+            while len(batch) < self.MAX_INSERT_BATCH:
+                try:
+                    append(get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                # Documents arrive pre-encoded (RawBSONDocument), so this
+                # is one wire round-trip with no per-doc re-encode
+                self.collection.insert_many(batch, ordered=False)
+                self.logger.info("Inserted %d messages", len(batch))
             except Exception as e:
-                self.logger.error(f"Error inserting record: {e}")
+                self.logger.error(f"Error inserting batch: {e}")
 
     def signal_handler(self, signum, frame):
         """Signal handler for clean shutdown"""
         self.running = False
         self.logger.info("Termination signal received")
 
+    STATUS_INTERVAL = 10.0
+
     def start(self):
-        """Start the MQTT client loop and log stats periodically"""
+        """Drive the MQTT network loop inline and log stats periodically"""
         self.logger.info("Starting MQTT subscriber...")
-        self.mqtt_client.loop_start()
-        
-        # Keep the main thread running and log stats periodically
+
+        # Run paho's network loop on this (otherwise idle) main thread
+        # instead of loop_start's extra thread: messages are parsed and
+        # enqueued right here with no cross-thread handoff into paho
         try:
+            next_status = time.monotonic() + self.STATUS_INTERVAL
+            reconnect_delay = 1.0
             while self.running:
-                self.logger.info(
-                    f"Status - Messages received: {self.messages_received}, "
-                    f"Devices processed: {self.devices_processed}"
-                )
-                time.sleep(10)
+                rc = self.mqtt_client.loop(timeout=0.1)
+                if rc != mqtt.MQTT_ERR_SUCCESS:
+                    # Bare loop() never reconnects (loop_forever does this
+                    # internally): after a broker drop it returns an error
+                    # immediately, so back off and reconnect here instead
+                    # of spinning on a dead socket
+                    self.logger.warning(
+                        "MQTT loop returned rc=%d; reconnecting in %.0fs",
+                        rc, reconnect_delay
+                    )
+                    deadline = time.monotonic() + reconnect_delay
+                    while self.running and time.monotonic() < deadline:
+                        time.sleep(0.5)
+                    reconnect_delay = min(reconnect_delay * 2, 60.0)
+                    try:
+                        self.mqtt_client.reconnect()
+                        reconnect_delay = 1.0
+                    except Exception as e:
+                        self.logger.error(f"Reconnect failed: {e}")
+                    continue
+                if time.monotonic() >= next_status:
+                    self.logger.info(
+                        "Status - Messages received: %d, Devices processed: %d, Dropped: %d",
+                        self.messages_received, self.devices_processed,
+                        self.dropped_messages
+                    )
+                    next_status = time.monotonic() + self.STATUS_INTERVAL
         except KeyboardInterrupt:
             self.logger.info("Received keyboard interrupt")
         except Exception as e:
@@ -297,10 +509,13 @@ class MQTTMongoSubscriber:
             self.mongo_client.close()
             self.logger.info("MongoDB connection closed")
             
-            if self.mongo_worker.is_alive():
+            if self.mongo_worker is not None and self.mongo_worker.is_alive():
                 self.mongo_worker.join(timeout=5)
 
             self.logger.info(f"Script finished: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+            # Flush queued records and stop the listener thread last so
+            # the shutdown messages still reach the log file
+            self._log_listener.stop()
         except Exception as e:
             self.logger.error(f"Error closing connections: {e}")
 
@@ -322,6 +537,14 @@ if __name__ == "__main__":
     parser.add_argument('--mongo-uri', type=str,
                         default="mongodb://localhost:27017/",
                         help='MongoDB URI (default: mongodb://localhost:27017/)')
+    parser.add_argument('--codec', type=str,
+                        choices=['binary', 'json'],
+                        default='binary',
+                        help='Payload codec: raw UART frames or the '
+                             'publisher\'s JSON documents (default: binary)')
+    parser.add_argument('--mongo-direct', action='store_true',
+                        help='Insert on the MQTT thread with w=0 write concern '
+                             'instead of the batching worker thread')
     parser.add_argument('--log-level', type=str,
                         choices=['info', 'debug'],
                         default='info',
@@ -337,6 +560,8 @@ if __name__ == "__main__":
             mqtt_username=args.mqtt_username,
             mqtt_password=args.mqtt_password,
             mongo_uri=args.mongo_uri,
+            mongo_direct=args.mongo_direct,
+            codec=args.codec,
             log_level=args.log_level
         )
         subscriber.start()
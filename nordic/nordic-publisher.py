@@ -1,10 +1,9 @@
 import time
+import socket
 import paho.mqtt.client as mqtt
 import logging
 import argparse
 import random
-import threading
-import queue
 from nordic_sim_2 import BLESimulator
 
 # Configure logging
@@ -35,17 +34,34 @@ def parse_arguments():
         "--max-devices",
         type=int,
         default=50,
-        help="Maximum number of devices per buffer (default: 50)",
+        help="Maximum number of devices per buffer (default: 50; ~33 keeps "
+             "the 9 + n*42 byte frame within a single ~1400-byte TCP segment)",
+    )
+    parser.add_argument(
+        "--qos",
+        type=int,
+        choices=[0, 1],
+        default=0,
+        help="MQTT QoS for the raw scan stream (default: 0; buffers are "
+             "replaceable so the QoS 1 PUBACK round-trip buys little)",
     )
     return parser.parse_args()
 
-def on_connect(client, userdata, flags, rc):
-    if rc == 0:
+def on_connect(client, userdata, flags, reason_code, properties):
+    if reason_code == 0:
         logger.info("Connected to MQTT broker successfully")
+        # Disable Nagle's algorithm so each scan buffer goes out as soon
+        # as it is written instead of waiting to coalesce with the next
+        try:
+            sock = client.socket()
+            if sock is not None:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (OSError, AttributeError) as e:
+            logger.warning(f"Could not set TCP_NODELAY: {e}")
     else:
-        logger.error(f"MQTT connection failed with code {rc}")
+        logger.error(f"MQTT connection failed with code {reason_code}")
 
-def on_publish(client, userdata, mid):
+def on_publish(client, userdata, mid, reason_code, properties):
     logger.debug(f"Message {mid} published.")
 
 # MQTT Client setup
@@ -57,23 +73,6 @@ def setup_mqtt_client():
     client.loop_start()
     return client
 
-def publisher_worker(simulator, mqtt_client, publish_queue):
-    """Worker thread to publish buffers from the publish_queue."""
-    while True:
-        buffer = publish_queue.get()
-        if buffer is None:
-            break
-
-        # Publish with QoS 1
-        result = mqtt_client.publish(MQTT_TOPIC, buffer, qos=1)
-        if result.rc != mqtt.MQTT_ERR_SUCCESS:
-            logger.error(f"Failed to publish message: {result.rc}")
-        else:
-            logger.info(f"Published buffer to {MQTT_TOPIC}")
-        # Reset buffer after publishing.
-        simulator.reset_buffer()
-        publish_queue.task_done()
-
 # Main function
 if __name__ == "__main__":
     args = parse_arguments()
@@ -89,12 +88,10 @@ if __name__ == "__main__":
         max_devices=args.max_devices,
     )
 
-    # Set up a queue to decouple simulation buffer creation from publishing.
-    publish_queue = queue.Queue()
-    pub_thread = threading.Thread(target=publisher_worker, args=(simulator, mqtt_client, publish_queue), daemon=True)
-    pub_thread.start()
-
-    # Simulate Nordic SoC and publish data to MQTT
+    # Simulate Nordic SoC and publish data to MQTT. publish() is
+    # non-blocking — it hands the packet to loop_start's network thread —
+    # so a dedicated publisher thread and queue would only add a context
+    # switch and a put/get pair per buffer.
     try:
         while True:
             if not simulator.buffer_active:
@@ -112,8 +109,13 @@ if __name__ == "__main__":
             # Print buffer info
             simulator.print_buffer_info(buffer)
 
-            # Enqueue buffer for publishing
-            publish_queue.put(buffer)
+            # Publish inline and reset for the next cycle
+            result = mqtt_client.publish(MQTT_TOPIC, buffer, qos=args.qos)
+            if result.rc != mqtt.MQTT_ERR_SUCCESS:
+                logger.error(f"Failed to publish message: {result.rc}")
+            else:
+                logger.info(f"Published buffer to {MQTT_TOPIC}")
+            simulator.reset_buffer()
 
             # Wait for the next sampling interval
             time.sleep(simulator.scan_time_ms / 1000)
@@ -121,7 +123,5 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("\nSimulation stopped.")
     finally:
-        publish_queue.put(None)
-        pub_thread.join()
         mqtt_client.loop_stop()
         mqtt_client.disconnect()
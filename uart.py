@@ -1,7 +1,20 @@
 import serial
+import select
 import struct
+from collections import namedtuple
 from datetime import datetime
 
+# Precompiled layouts: one C-level unpack per header/device instead of
+# per-field slicing and int.from_bytes calls
+_HEADER_STRUCT = struct.Struct('<4sBHB')
+_DEVICE_STRUCT = struct.Struct('<6sBBbB31sB')
+
+# Parsed records as namedtuples: a fraction of a dict's memory, C-level
+# attribute access, and the field names still document the layout
+Header = namedtuple('Header', ('sequence', 'n_adv_raw', 'n_mac'))
+Device = namedtuple('Device', ('mac', 'addr_type', 'adv_type', 'rssi',
+                               'data_len', 'data', 'n_adv'))
+
 class UARTReceiver:
     # UART Protocol Constants - Matching C definitions
     HEADER_MAGIC = b'\x55\x55\x55\x55'
@@ -18,6 +31,10 @@ class UARTReceiver:
             timeout=0  # Non-blocking reads
         )
         self.sequence = 0
+        # Frames arrive slower than the port is polled (a 50-device frame
+        # takes ~180 ms at 115200 baud), so partial reads are the norm:
+        # accumulate across calls instead of discarding what has arrived
+        self._scan_buf = bytearray()
 
     def _parse_header(self, data):
         """Parse buffer header"""
@@ -25,20 +42,14 @@ class UARTReceiver:
             if len(data) != self.HEADER_LENGTH:
                 return None
             
+            # Parse all fields in one call
+            magic, sequence, n_adv_raw, n_mac = _HEADER_STRUCT.unpack(data)
+
             # Verify magic header
-            if data[:4] != self.HEADER_MAGIC:
+            if magic != self.HEADER_MAGIC:
                 return None
 
-            # Parse fields
-            sequence = data[4]  # 1 byte
-            n_adv_raw = int.from_bytes(data[5:7], byteorder='little')  # 2 bytes
-            n_mac = data[7]  # 1 byte
-            
-            return {
-                'sequence': sequence,
-                'n_adv_raw': n_adv_raw,
-                'n_mac': n_mac
-            }
+            return Header(sequence, n_adv_raw, n_mac)
         except Exception as e:
             print(f"Error parsing header: {e}")
             return None
@@ -49,36 +60,33 @@ class UARTReceiver:
             if len(data) != self.DEVICE_LENGTH:
                 return None
                 
-            device = {}
-            
-            # MAC address (6 bytes)
-            device['mac'] = ':'.join(f'{b:02X}' for b in data[0:6])
-            
-            # Address type (1 byte)
-            device['addr_type'] = data[6]
-            
-            # Advertisement type (1 byte)
-            device['adv_type'] = data[7]
-            
-            # RSSI (1 byte, signed)
-            rssi_byte = data[8]
-            device['rssi'] = -(256 - rssi_byte) if rssi_byte > 127 else -rssi_byte
-            
-            # Data length (1 byte)
-            device['data_len'] = data[9]
-            
-            # Advertisement data (31 bytes)
-            device['data'] = data[10:41]
-            
-            # Number of advertisements (1 byte)
-            device['n_adv'] = data[41]
-            
-            return device
+            # Single unpack: mac (6), addr_type, adv_type, rssi (signed),
+            # data_len, advertisement data (31), n_adv
+            (mac_bytes, addr_type, adv_type, rssi,
+             data_len, adv_data, n_adv) = _DEVICE_STRUCT.unpack(data)
+
+            # bytes.hex runs the colon-separated MAC formatting in C, no
+            # per-byte f-string/generator temporaries
+            return Device(mac_bytes.hex(':').upper(), addr_type, adv_type,
+                          rssi, data_len, adv_data, n_adv)
 
         except Exception as e:
             print(f"Error parsing device data: {e}")
             return None
 
+    def _parse_devices(self, blob):
+        """Decode consecutive 42-byte device records in one C-driven pass
+
+        Struct.iter_unpack walks the whole blob inside the struct module,
+        so the only per-record Python work is building the Device tuple.
+        """
+        return [
+            Device(mac.hex(':').upper(), addr_type, adv_type,
+                   rssi, data_len, adv_data, n_adv)
+            for mac, addr_type, adv_type, rssi, data_len, adv_data, n_adv
+            in _DEVICE_STRUCT.iter_unpack(blob)
+        ]
+
     def _check_sequence(self, received_seq):
         """Verify message sequence"""
         expected = (self.sequence + 1) % 256
@@ -86,41 +94,61 @@ class UARTReceiver:
             print(f"Sequence mismatch! Expected: {expected}, Received: {received_seq}")
         self.sequence = received_seq
 
-    def receive_buffer(self):
-        """Receive a single complete buffer"""
+    def wait_for_data(self, timeout=1.0):
+        """Block in the kernel until serial data is available (POSIX only)
+
+        With the port in non-blocking mode, polling receive_buffer spins
+        Python code between bytes; select() sleeps until the fd is
+        readable instead. Returns True if data is waiting.
+        """
+        ready, _, _ = select.select([self.serial.fileno()], [], [], timeout)
+        return bool(ready)
+
+    def receive_buffer(self, parse_devices=True):
+        """Receive a single complete buffer
+
+        With parse_devices=False the device records are returned as raw
+        bytes instead of parsed dicts, so callers that just forward the
+        payload (e.g. straight to MQTT) pay zero parsing cost.
+        """
         try:
-            # Read with non-blocking
-            if not self.serial.in_waiting:
+            # Top up the assembly buffer with whatever is pending; a frame
+            # still arriving on the wire accumulates across calls instead
+            # of being drained once and thrown away
+            if self.serial.in_waiting:
+                self._scan_buf += self.serial.read(self.serial.in_waiting)
+
+            # Locate the header magic with a C-level search instead of one
+            # read() per byte; garbage before it is dropped, keeping a
+            # 3-byte tail in case the magic is split across reads
+            idx = self._scan_buf.find(self.HEADER_MAGIC)
+            if idx < 0:
+                del self._scan_buf[:-3]
                 return None, None
+            del self._scan_buf[:idx]
 
-            # Look for header magic
-            while self.serial.in_waiting >= 4:
-                if self.serial.read() == b'\x55':
-                    potential_header = b'\x55' + self.serial.read(3)
-                    if potential_header == self.HEADER_MAGIC:
-                        # Read rest of header
-                        header_rest = self.serial.read(4)  # sequence + n_adv_raw + n_mac
-                        if len(header_rest) != 4:
-                            continue
-                        
-                        header = self._parse_header(potential_header + header_rest)
-                        if not header:
-                            continue
-
-                        # Read devices
-                        devices = []
-                        for _ in range(header['n_mac']):
-                            device_data = self.serial.read(self.DEVICE_LENGTH)
-                            if len(device_data) != self.DEVICE_LENGTH:
-                                return None, None
-                            
-                            device = self._parse_device(device_data)
-                            if device:
-                                devices.append(device)
-                        
-                        return header, devices
+            if len(self._scan_buf) < self.HEADER_LENGTH:
+                # Header still arriving; keep it for the next call
+                return None, None
 
-            return None, None
+            header = self._parse_header(bytes(self._scan_buf[:self.HEADER_LENGTH]))
+            if not header:
+                # Corrupt header: skip this magic so the next scan resyncs
+                del self._scan_buf[:len(self.HEADER_MAGIC)]
+                return None, None
+
+            needed = self.HEADER_LENGTH + header.n_mac * self.DEVICE_LENGTH
+            if len(self._scan_buf) < needed:
+                # Device records still arriving; keep the partial frame
+                return None, None
+
+            blob = bytes(self._scan_buf[self.HEADER_LENGTH:needed])
+            del self._scan_buf[:needed]
+
+            if not parse_devices:
+                return header, blob
+
+            return header, self._parse_devices(blob)
 
         except Exception as e:
             print(f"Error receiving buffer: {e}")
@@ -133,21 +161,27 @@ class UARTReceiver:
 
 if __name__ == "__main__":
     try:
-        receiver = UARTReceiver(port='/dev/ttyUSB0')  
-        header, devices = receiver.receive_buffer()
+        receiver = UARTReceiver(port='/dev/ttyUSB0')
+        # Sleep in select() until the scanner sends something instead of
+        # spinning on empty non-blocking reads
+        header, devices = None, None
+        while not header:
+            if not receiver.wait_for_data(timeout=1.0):
+                continue
+            header, devices = receiver.receive_buffer()
         if header and devices:
             print("\n=== Buffer Received ===")
             print(f"Timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]}")
-            print(f"Sequence: {header['sequence']}")
-            print(f"Total Advertisements: {header['n_adv_raw']}")
-            print(f"Number of MACs: {header['n_mac']}")
+            print(f"Sequence: {header.sequence}")
+            print(f"Total Advertisements: {header.n_adv_raw}")
+            print(f"Number of MACs: {header.n_mac}")
             print("====================\n")
 
             for i, device in enumerate(devices):
                 print(f"Device {i+1}:")
-                print(f"  MAC: {device['mac']}")
-                print(f"  RSSI: {device['rssi']} dBm")
-                print(f"  Advertisements: {device['n_adv']}")
+                print(f"  MAC: {device.mac}")
+                print(f"  RSSI: {device.rssi} dBm")
+                print(f"  Advertisements: {device.n_adv}")
                 print("--------------------")
     except Exception as e:
         print(f"Error: {e}")
@@ -2,6 +2,11 @@ import serial
 import struct
 from datetime import datetime
 
+# Structs precompilados: un solo unpack en C por cabecera/dispositivo en
+# vez de trocear campo a campo
+_HEADER_STRUCT = struct.Struct('<4sBHB')
+_DEVICE_STRUCT = struct.Struct('<6sBBbB31sB')
+
 class UARTReceiver:
     def __init__(self,port="COM21",baudrate=115200):
         self.serial = serial.Serial(port,baudrate)
@@ -30,6 +35,10 @@ class UARTReceiver:
         self.HEADER_LENGTH = sum(self.HEADER_FORMAT.values())
         self.DEVICE_LENGTH = sum(self.DEVICE_FORMAT.values())
 
+        # Scan buffer: los datos se leen en bloque y el magic se localiza
+        # con bytes.find (búsqueda en C) en vez de un read() por byte
+        self._scan_buf = bytearray()
+
 
     def _check_header(self,data):
         return data.startswith(self.HEADER_MAGIC)
@@ -37,22 +46,18 @@ class UARTReceiver:
 
     def _parse_header(self,data):
         try:
-            offset = 0 
-            header = {}
             # Check Header MAGIC
             if not self._check_header(data):
                 return None
-            offset +=4
-
-            header['sequence'] = data[offset]
-            offset +=1
 
-            header['n_adv_raw'] = struct.unpack('<H',data[offset:offset+2])[0]
-            offset +=2
+            # Todos los campos en una sola llamada
+            _, sequence, n_adv_raw, n_mac = _HEADER_STRUCT.unpack(data)
 
-            header['n_mac'] = data[offset]
-
-            return header
+            return {
+                'sequence': sequence,
+                'n_adv_raw': n_adv_raw,
+                'n_mac': n_mac
+            }
 
         except Exception as e:
             print(f"Error parsing header: {e}")
@@ -60,34 +65,21 @@ class UARTReceiver:
     def _parse_device(self,data):
 
         try:
-            offset = 0
-            device = {}
-
-            #parse mac -> format each byte as a 2-digit hex
-
-            device['mac'] = ':'.join(f'{b:02X}' for b in data[offset:offset+6])
-
-            offset+=6
-
-            device['addr_type'] = data[offset]
-            offset+=1
-
-            device['adv_type'] = data[offset]
-            offset+=1
-
-            rssi_byte = data[offset]
-            device['rssi'] = -(256 - rssi_byte) if rssi_byte > 127 else -rssi_byte
-            offset +=1
-
-            device['data_len'] = data[offset]
-            offset+=1
-
-            device['data'] = data[offset:offset+31]
-            offset +=31
-
-            device['n_adv'] = data[offset]
-
-            return device
+            # Un solo unpack: mac (6), addr_type, adv_type, rssi (con signo),
+            # data_len, datos (31), n_adv
+            (mac_bytes, addr_type, adv_type, rssi,
+             data_len, adv_data, n_adv) = _DEVICE_STRUCT.unpack(data)
+
+            return {
+                #parse mac -> bytes.hex hace el formato separado por ':' en C
+                'mac': mac_bytes.hex(':').upper(),
+                'addr_type': addr_type,
+                'adv_type': adv_type,
+                'rssi': rssi,
+                'data_len': data_len,
+                'data': adv_data,
+                'n_adv': n_adv
+            }
 
         except Exception as e:
             print(f"Error parsing device data: {e}")
@@ -99,6 +91,17 @@ class UARTReceiver:
         self.sequence = received_seq
 
 
+    def _read_exact(self, size):
+        """Lee exactamente size bytes, vaciando primero el scan buffer"""
+        data = bytes(self._scan_buf[:size])
+        del self._scan_buf[:len(data)]
+        while len(data) < size:
+            chunk = self.serial.read(size - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return data
+
     def received_messages(self):
         print("Starting message reception...")
 
@@ -106,12 +109,22 @@ class UARTReceiver:
             #Search header
             try:
                 while True:
-                    if self.serial.read()== b'\x55':
-                        potential_header = b'\x55' + self.serial.read(3)
-                        if potential_header == self.HEADER_MAGIC:
-                            break
+                    # Escanear primero lo ya almacenado: un read puede
+                    # traer más de un frame, y el siguiente ya espera en
+                    # el scan buffer sin necesidad de bytes nuevos
+                    idx = self._scan_buf.find(self.HEADER_MAGIC)
+                    if idx >= 0:
+                        del self._scan_buf[:idx]
+                        break
+                    # Conservar solo la cola que todavía puede ser el
+                    # comienzo de un magic partido entre chunks
+                    del self._scan_buf[:-3]
+                    chunk = self.serial.read(max(1, self.serial.in_waiting))
+                    if not chunk:
+                        continue
+                    self._scan_buf += chunk
 
-                header_data =  potential_header + self.serial.read(self.HEADER_LENGTH-4)
+                header_data = self._read_exact(self.HEADER_LENGTH)
                 header = self._parse_header(header_data)
 
 
@@ -126,10 +139,20 @@ class UARTReceiver:
                 print("====================\n")
 
 
-                # Parse each device
+                # Leer todos los dispositivos en un solo read (1 syscall en
+                # vez de n_mac) y trocear despues
+                expected = header['n_mac'] * self.DEVICE_LENGTH
+                device_blob = self._read_exact(expected)
+                if len(device_blob) != expected:
+                    print(f"Buffer incompleto: {len(device_blob)}/{expected} bytes")
+                    continue
 
+                # memoryview: cada rebanada es una vista O(1), sin copiar
+                # 42 bytes por dispositivo
+                device_mv = memoryview(device_blob)
                 for i in range(header['n_mac']):
-                    device_data = self.serial.read(self.DEVICE_LENGTH)
+                    device_data = device_mv[i * self.DEVICE_LENGTH:
+                                            (i + 1) * self.DEVICE_LENGTH]
                     device = self._parse_device(device_data)
 
 